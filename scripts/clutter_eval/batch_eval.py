@@ -372,14 +372,21 @@ class BatchEvaluator:
             }
             inputs = {k: v.to(self.device) for k, v in inputs.items()}
 
+            # Attention hooks only record inside capture(): first step only
+            capture_attention = bool(cnt_step == 0 and self.attention_capture is not None and output_dir)
+
             start_inference = time.time()
             with torch.inference_mode():
-                actions = self.model(**inputs)
+                if capture_attention:
+                    with self.attention_capture.capture():
+                        actions = self.model(**inputs)
+                else:
+                    actions = self.model(**inputs)
             if cnt_step > 0:
                 inference_times.append(time.time() - start_inference)
 
             # Save attention map on first inference step
-            if cnt_step == 0 and self.attention_capture is not None and output_dir:
+            if capture_attention:
                 # Get the original image for visualization
                 pixel_values = inputs["pixel_values"].cpu().float()  # Convert bf16 -> float32
                 # pixel_values is [B, C, H, W] normalized, convert to [H, W, C] uint8
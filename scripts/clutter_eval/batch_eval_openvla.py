@@ -134,6 +134,8 @@ class OpenVLABatchEvaluator:
         device: int = 0,
         use_bf16: bool = True,
         load_in_8bit: bool = False,
+        load_in_4bit: bool = False,
+        attn_implementation: Optional[str] = None,
         act_steps: int = 1,
         recording: bool = False,
         cgvd_save_debug: bool = False,
@@ -148,6 +150,7 @@ class OpenVLABatchEvaluator:
         self.gpu_id = device
         self.use_bf16 = use_bf16
         self.load_in_8bit = load_in_8bit
+        self.load_in_4bit = load_in_4bit
         self.act_steps = act_steps
         self.recording = recording
         self.cgvd_save_debug = cgvd_save_debug
@@ -171,6 +174,8 @@ class OpenVLABatchEvaluator:
             device=self.device_str,
             use_bf16=use_bf16,
             load_in_8bit=load_in_8bit,
+            load_in_4bit=load_in_4bit,
+            attn_implementation=attn_implementation,
         )
 
         self.model_load_time = time.time() - model_load_start
@@ -999,6 +1004,11 @@ def main():
     parser.add_argument("--use_bf16", action="store_true", default=True)
     parser.add_argument("--load_in_8bit", action="store_true", default=False,
                        help="Load model in 8-bit quantization (reduces VRAM)")
+    parser.add_argument("--load_in_4bit", action="store_true", default=False,
+                       help="Load model in 4-bit NF4 quantization (about half the VRAM of 8-bit)")
+    parser.add_argument("--attn_implementation", type=str, default=None,
+                       choices=["auto", "flash_attention_2", "sdpa", "eager"],
+                       help="Attention kernel for the LLM backbone (default: the model's own)")
     parser.add_argument("--act_steps", type=int, default=1,
                        help="Number of action steps to execute per inference (default: 1, no chunking)")
 
@@ -1047,6 +1057,8 @@ def main():
     print(f"Runs per config: {args.runs}")
     print(f"Act steps: {args.act_steps}")
     print(f"8-bit quantization: {args.load_in_8bit}")
+    print(f"4-bit quantization: {args.load_in_4bit}")
+    print(f"Attention implementation: {args.attn_implementation or 'model default'}")
     print(f"Total configurations: {len(configs)}")
     print(f"Total episodes: {len(configs) * args.episodes * 2}")
     print("=" * 70)
@@ -1071,6 +1083,8 @@ def main():
         device=args.gpu_id,
         use_bf16=args.use_bf16,
         load_in_8bit=args.load_in_8bit,
+        load_in_4bit=args.load_in_4bit,
+        attn_implementation=args.attn_implementation,
         act_steps=args.act_steps,
         recording=args.recording,
         cgvd_save_debug=args.cgvd_save_debug,
@@ -135,6 +135,7 @@ class SpatialVLABatchEvaluator:
         unnorm_key: str = "bridge_orig/1.0.0",
         device: int = 0,
         act_steps: int = 4,
+        compile_model: bool = False,
         recording: bool = False,
         cgvd_save_debug: bool = False,
         cgvd_verbose: bool = False,
@@ -167,6 +168,7 @@ class SpatialVLABatchEvaluator:
             model_path=model_path,
             unnorm_key=unnorm_key,
             device=self.device_str,
+            compile_model=compile_model,
         )
 
         self.model_load_time = time.time() - model_load_start
@@ -997,6 +999,8 @@ def main():
     parser.add_argument("--gpu_id", type=int, default=0)
     parser.add_argument("--act_steps", type=int, default=4,
                        help="Number of action steps to execute per inference (default: 4, action chunking)")
+    parser.add_argument("--compile_model", action="store_true",
+                       help="torch.compile the vision tower (compiled and warmed up at load)")
 
     # Sweep configuration
     parser.add_argument("--categories", type=str, nargs="+",
@@ -1065,6 +1069,7 @@ def main():
         unnorm_key=args.unnorm_key,
         device=args.gpu_id,
         act_steps=args.act_steps,
+        compile_model=args.compile_model,
         recording=args.recording,
         cgvd_save_debug=args.cgvd_save_debug,
         cgvd_verbose=args.cgvd_verbose,
@@ -3,7 +3,9 @@
 SAM3 Segmentation Server
 
 Runs SAM3 in a separate process to avoid transformers version conflicts.
-Communicates via a simple file-based protocol.
+Communicates via a simple file-based protocol: the request/response files
+carry metadata, while pixels and masks travel through shared memory blocks
+created by the client.
 
 Usage:
     # In a separate terminal with transformers >= 5.0.0:
@@ -11,8 +13,12 @@ Usage:
 
     # Or run in background:
     python scripts/sam3_server.py &
+
+    # Per-request/per-detection logging (off by default, it slows the loop):
+    python scripts/sam3_server.py --verbose
 """
 
+import argparse
 import json
 import os
 import sys
@@ -22,7 +28,239 @@ from pathlib import Path
 import numpy as np
 
 
+def _attach_shm(name, cache):
+    """Open a client-owned shared memory block by name, reusing open handles.
+
+    Handles for blocks the client has since replaced are closed. The server
+    never unlinks: the client owns the segments.
+    """
+    from multiprocessing import resource_tracker, shared_memory
+
+    shm = cache.get(name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        # Python < 3.13 registers attached blocks too and would unlink them
+        # when the server exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+        cache[name] = shm
+    return shm
+
+
+def _release_stale_shm(cache, keep):
+    """Close handles for blocks the client has since replaced.
+
+    A handle whose buffer is still exported (a live view into it) cannot be
+    closed yet; it stays cached and is retried on the next request instead of
+    being dropped, which would leak the mapping.
+    """
+    for name in [n for n in cache if n not in keep]:
+        try:
+            cache[name].close()
+        except BufferError:
+            print(f"[SAM3 Server] WARNING: shared memory {name} still in use, retrying release later")
+            continue
+        del cache[name]
+
+
+def _notify_client(fifo_path):
+    """Wake a waiting client by writing one byte to its FIFO (if it has one)."""
+    try:
+        fd = os.open(fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+    except OSError:
+        # No FIFO or no reader: older client that polls for the response file
+        return
+    try:
+        os.write(fd, b"\x01")
+    except BlockingIOError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def handle_request(request, processor, model, device, shm_cache, verbose=False):
+    """Segment one request and return the arrays to save in the response.
+
+    Args:
+        request: Parsed request.json contents
+        processor: Sam3Processor (or a compatible stand-in)
+        model: Sam3Model (or a compatible stand-in)
+        device: Device the model runs on
+        shm_cache: Open client shared memory blocks by name (updated in place)
+        verbose: Log the request and every detection
+
+    Returns:
+        dict of arrays for the response npz
+    """
+    import torch
+    from PIL import Image
+
+    concepts = request['concepts']
+    threshold = request.get('threshold', 0.5)
+
+    # Load image: shared memory view, or a PNG from older clients
+    mask_out = None
+    if 'image_shm' in request:
+        shape = tuple(request['image_shape'])
+        _release_stale_shm(shm_cache, (request['image_shm'], request['mask_shm']))
+        image_buf = _attach_shm(request['image_shm'], shm_cache).buf
+        image = Image.fromarray(np.ndarray(shape, dtype=np.uint8, buffer=image_buf))
+        mask_buf = _attach_shm(request['mask_shm'], shm_cache).buf
+        mask_out = np.ndarray((len(concepts) + 1, shape[0], shape[1]), dtype=bool, buffer=mask_buf)
+        mask_out[...] = False
+    else:
+        image = Image.open(request['image_path']).convert('RGB')
+
+    if verbose:
+        print(f"[SAM3 Server] Processing: {concepts}")
+
+    # Run segmentation
+    if mask_out is not None:
+        combined_mask = mask_out[0]
+    else:
+        combined_mask = np.zeros((image.height, image.width), dtype=bool)
+    concept_masks = {}   # {concept: mask}
+    concept_scores = {}  # {concept: best_score}
+
+    # One vision pass, then all concepts in a single batched
+    # forward (vision embeddings broadcast to one row per concept)
+    batch_results = []
+    if concepts:
+        img_inputs = processor(images=image, return_tensors="pt")
+        original_sizes = img_inputs.get("original_sizes")
+        text_inputs = processor(text=concepts, return_tensors="pt").to(device)
+        n = len(concepts)
+
+        with torch.no_grad():
+            vision_embeds = model.get_vision_features(
+                pixel_values=img_inputs["pixel_values"].to(device, dtype=model.dtype)
+            )
+            vision_embeds = type(vision_embeds)(**{
+                k: v.expand(n, *v.shape[1:]) if isinstance(v, torch.Tensor)
+                else tuple(t.expand(n, *t.shape[1:]) for t in v) if isinstance(v, tuple)
+                else v
+                for k, v in vision_embeds.items()
+            })
+            outputs = model(vision_embeds=vision_embeds, **text_inputs)
+
+        # Use post_process_instance_segmentation for SAM3
+        target_sizes = original_sizes.tolist() if original_sizes is not None else [[image.height, image.width]]
+        batch_results = processor.post_process_instance_segmentation(
+            outputs,
+            threshold=threshold,
+            mask_threshold=0.3,
+            target_sizes=target_sizes * n,
+        )
+
+    for idx, (concept, result) in enumerate(zip(concepts, batch_results)):
+        if mask_out is not None:
+            concept_mask = mask_out[idx + 1]
+        else:
+            concept_mask = np.zeros((image.height, image.width), dtype=bool)
+        best_score = 0.0
+
+        if "masks" in result and len(result["masks"]) > 0:
+            scores = result.get("scores", torch.ones(len(result["masks"])))
+            for i, mask_tensor in enumerate(result["masks"]):
+                score = float(scores[i].cpu()) if isinstance(scores[i], torch.Tensor) else float(scores[i])
+                if score > threshold:
+                    mask_np = mask_tensor.cpu().numpy().astype(bool)
+                    if mask_np.ndim == 3:
+                        mask_np = mask_np[0]
+                    concept_mask |= mask_np
+                    best_score = max(best_score, score)
+                    combined_mask |= mask_np
+                    if verbose:
+                        print(f"[SAM3 Server] Concept '{concept}': score={score:.3f}")
+
+        concept_masks[concept] = concept_mask
+        concept_scores[concept] = best_score
+
+    if verbose:
+        print(f"[SAM3 Server] Done. Mask coverage: {combined_mask.sum() / combined_mask.size * 100:.1f}%")
+
+    # Response with per-concept data. Shared memory clients already have
+    # the masks; send scores only.
+    if mask_out is not None:
+        return {'scores': np.array([concept_scores[c] for c in concepts], dtype=np.float32)}
+    save_dict = {'mask': combined_mask}
+    for concept, cmask in concept_masks.items():
+        save_dict[f'mask_{concept}'] = cmask
+        save_dict[f'score_{concept}'] = np.array(concept_scores[concept])
+    return save_dict
+
+
+def serve(comm_dir, processor, model, device, verbose=False, should_stop=None):
+    """Answer client requests in ``comm_dir`` until interrupted or ``should_stop()``.
+
+    Args:
+        comm_dir: Communication directory shared with the clients
+        processor: Sam3Processor (or a compatible stand-in)
+        model: Sam3Model (or a compatible stand-in)
+        device: Device the model runs on
+        verbose: Log every request and detection
+        should_stop: Optional callable polled between requests
+    """
+    comm_dir = Path(comm_dir)
+    comm_dir.mkdir(exist_ok=True)
+    request_file = comm_dir / "request.json"
+    response_file = comm_dir / "response.npz"
+    ready_file = comm_dir / "ready"
+    fifo_path = comm_dir / "response.fifo"
+
+    shm_cache = {}  # client shared memory blocks by name
+
+    # Signal ready
+    ready_file.touch()
+    print(f"[SAM3 Server] Ready. Listening for requests in {comm_dir}")
+
+    try:
+        while should_stop is None or not should_stop():
+            try:
+                # Wait for request
+                if request_file.exists():
+                    with open(request_file, 'r') as f:
+                        request = json.load(f)
+
+                    # Remove request file to signal processing
+                    request_file.unlink()
+
+                    save_dict = handle_request(request, processor, model, device, shm_cache, verbose)
+
+                    # Save response (atomic write via temp + rename). Use a tmp
+                    # name ending in .npz so np.savez_compressed doesn't append
+                    # an extra .npz extension (it auto-appends when missing).
+                    tmp_response = comm_dir / "response_tmp.npz"
+                    np.savez_compressed(tmp_response, **save_dict)
+                    tmp_response.rename(response_file)
+                    _notify_client(fifo_path)
+
+                time.sleep(0.01)  # 10ms polling
+
+            except KeyboardInterrupt:
+                print("\n[SAM3 Server] Shutting down...")
+                break
+            except Exception as e:
+                print(f"[SAM3 Server] Error: {e}")
+                # Save error response (atomic write)
+                tmp_response = comm_dir / "response_tmp.npz"
+                np.savez_compressed(tmp_response, mask=np.zeros((1, 1), dtype=bool), error=str(e))
+                tmp_response.rename(response_file)
+                _notify_client(fifo_path)
+    finally:
+        ready_file.unlink(missing_ok=True)
+        for shm in shm_cache.values():
+            try:
+                shm.close()
+            except BufferError:
+                print(f"[SAM3 Server] WARNING: shared memory {shm.name} still in use at shutdown")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="SAM3 segmentation server")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Log every request and detection")
+    args = parser.parse_args()
+
     # Check transformers version
     import transformers
     version = transformers.__version__
@@ -48,108 +286,7 @@ def main():
     model.eval()
     print(f"[SAM3 Server] Model loaded on {device}")
 
-    # Communication directory
-    comm_dir = Path("/tmp/sam3_server")
-    comm_dir.mkdir(exist_ok=True)
-    request_file = comm_dir / "request.json"
-    response_file = comm_dir / "response.npz"
-    ready_file = comm_dir / "ready"
-
-    # Signal ready
-    ready_file.touch()
-    print(f"[SAM3 Server] Ready. Listening for requests in {comm_dir}")
-
-    while True:
-        try:
-            # Wait for request
-            if request_file.exists():
-                with open(request_file, 'r') as f:
-                    request = json.load(f)
-
-                # Remove request file to signal processing
-                request_file.unlink()
-
-                # Load image
-                image_path = request['image_path']
-                concepts = request['concepts']
-                threshold = request.get('threshold', 0.5)
-
-                from PIL import Image
-                image = Image.open(image_path).convert('RGB')
-
-                print(f"[SAM3 Server] Processing: {concepts}")
-
-                # Run segmentation
-                combined_mask = np.zeros((image.height, image.width), dtype=bool)
-                concept_masks = {}   # {concept: mask}
-                concept_scores = {}  # {concept: best_score}
-
-                for concept in concepts:
-                    inputs = processor(
-                        images=image,
-                        text=concept,
-                        return_tensors="pt"
-                    ).to(device)
-
-                    original_sizes = inputs.get("original_sizes")
-
-                    with torch.no_grad():
-                        outputs = model(**inputs)
-
-                    # Use post_process_instance_segmentation for SAM3
-                    target_sizes = original_sizes.tolist() if original_sizes is not None else [[image.height, image.width]]
-                    results = processor.post_process_instance_segmentation(
-                        outputs,
-                        threshold=threshold,
-                        mask_threshold=0.3,
-                        target_sizes=target_sizes,
-                    )
-
-                    concept_mask = np.zeros((image.height, image.width), dtype=bool)
-                    best_score = 0.0
-
-                    if results and len(results) > 0:
-                        result = results[0]
-                        if "masks" in result and len(result["masks"]) > 0:
-                            scores = result.get("scores", torch.ones(len(result["masks"])))
-                            for i, mask_tensor in enumerate(result["masks"]):
-                                score = float(scores[i].cpu()) if isinstance(scores[i], torch.Tensor) else float(scores[i])
-                                if score > threshold:
-                                    mask_np = mask_tensor.cpu().numpy().astype(bool)
-                                    if mask_np.ndim == 3:
-                                        mask_np = mask_np[0]
-                                    concept_mask |= mask_np
-                                    best_score = max(best_score, score)
-                                    combined_mask |= mask_np
-                                    print(f"[SAM3 Server] Concept '{concept}': score={score:.3f}")
-
-                    concept_masks[concept] = concept_mask
-                    concept_scores[concept] = best_score
-
-                # Save response with per-concept data (atomic write via temp + rename)
-                save_dict = {'mask': combined_mask}
-                for concept, cmask in concept_masks.items():
-                    save_dict[f'mask_{concept}'] = cmask
-                    save_dict[f'score_{concept}'] = np.array(concept_scores[concept])
-                # Use a tmp name ending in .npz so np.savez_compressed doesn't
-                # append an extra .npz extension (it auto-appends when missing).
-                tmp_response = comm_dir / "response_tmp.npz"
-                np.savez_compressed(tmp_response, **save_dict)
-                tmp_response.rename(response_file)
-                print(f"[SAM3 Server] Done. Mask coverage: {combined_mask.sum() / combined_mask.size * 100:.1f}%")
-
-            time.sleep(0.01)  # 10ms polling
-
-        except KeyboardInterrupt:
-            print("\n[SAM3 Server] Shutting down...")
-            ready_file.unlink(missing_ok=True)
-            break
-        except Exception as e:
-            print(f"[SAM3 Server] Error: {e}")
-            # Save error response (atomic write)
-            tmp_response = comm_dir / "response_tmp.npz"
-            np.savez_compressed(tmp_response, mask=np.zeros((1, 1), dtype=bool), error=str(e))
-            tmp_response.rename(response_file)
+    serve(Path("/tmp/sam3_server"), processor, model, device, verbose=args.verbose)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@
 
 import os
 import time
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 import cv2
@@ -11,6 +12,41 @@ from src.cgvd.instruction_parser import InstructionParser
 from src.cgvd.sam3_segmenter import SAM3Segmenter, get_sam3_segmenter
 
 
+@lru_cache(maxsize=256)
+def _instance_base_name(name: str) -> str:
+    """Strip the instance index from a segmenter key ("spoon_1" -> "spoon")."""
+    base, sep, idx = name.rpartition('_')
+    return base if sep and idx.isdigit() else name
+
+
+_OUTLINE_KERNEL = np.ones((3, 3), dtype=np.uint8)
+
+
+def _draw_outline(panel: np.ndarray, mask_u8: np.ndarray, color, thickness: int = 1):
+    """Paint the outline of a binary uint8 mask onto an RGB panel in place.
+
+    Uses a morphological edge (mask minus its erosion for 1 px, the 3x3
+    gradient for 2 px) instead of findContours/drawContours, which get slow
+    on detailed masks and are only needed here for display. Pixels outside
+    the image count as background, so masks touching the border keep their
+    outline there, as with drawContours.
+    """
+    if thickness > 1:
+        edge = cv2.morphologyEx(
+            mask_u8,
+            cv2.MORPH_GRADIENT,
+            _OUTLINE_KERNEL,
+            borderType=cv2.BORDER_CONSTANT,
+            borderValue=0,
+        )
+    else:
+        eroded = cv2.erode(
+            mask_u8, _OUTLINE_KERNEL, borderType=cv2.BORDER_CONSTANT, borderValue=0
+        )
+        edge = cv2.bitwise_xor(mask_u8, eroded)
+    panel[edge.view(bool)] = color
+
+
 class CGVDWrapper(gym.Wrapper):
     """Concept-Gated Visual Distillation wrapper for SimplerEnv.
 
@@ -123,6 +159,14 @@ class CGVDWrapper(gym.Wrapper):
         self.safe_dilation = safe_dilation
         self._step4_safe_dilation = max(self.safe_dilation, self.lama_dilation)
         self._reinforce_size = self._step4_safe_dilation + 3 * int(np.ceil(self.blend_sigma))
+        self._reinforce_kernel = np.ones((self._reinforce_size, self._reinforce_size), np.uint8)
+        # Feathering: last compositing mask, its GaussianBlur, and a per-shape working copy
+        self._feather_src: Optional[np.ndarray] = None
+        self._feather_blur: Optional[np.ndarray] = None
+        self._feather_buf: Optional[np.ndarray] = None
+        # Dilated binary safe set for compositing, and the cached_safe_mask it was built from
+        self._safe_halo: Optional[np.ndarray] = None
+        self._safe_halo_src: Optional[np.ndarray] = None
         self.cache_refresh_interval = cache_refresh_interval
 
         # Ablation flags
@@ -199,6 +243,11 @@ class CGVDWrapper(gym.Wrapper):
         self.total_lama_time: float = 0.0
 
 
+    @property
+    def _logging_enabled(self) -> bool:
+        """Whether _log() writes anywhere (lets hot paths skip message formatting)."""
+        return self.verbose or self.log_file is not None
+
     def _log(self, msg: str):
         """Log message to console (if verbose) and to file (if save_debug_images)."""
         if self.verbose:
@@ -276,28 +325,35 @@ class CGVDWrapper(gym.Wrapper):
         if not safe_masks or not distractor_masks:
             return {}
 
-        genuineness_scores = {}
+        # Only target instances are scored; skip all mask work if there are none
+        target_names = [n for n in safe_masks if _instance_base_name(n) == self.current_target]
+        if not target_names:
+            return {}
 
-        for safe_name, safe_mask in safe_masks.items():
-            base = safe_name.rsplit('_', 1)[0] if '_' in safe_name and safe_name.rsplit('_', 1)[1].isdigit() else safe_name
+        # Binarize each distractor once instead of once per target instance;
+        # empty distractors can never overlap so are dropped up front
+        dist_binaries = []
+        for dist_name, dist_mask in distractor_masks.items():
+            dist_binary = dist_mask > 0.5
+            dist_area = int(dist_binary.sum())
+            if dist_area > 0:
+                dist_binaries.append((dist_name, dist_binary, dist_area))
 
-            # Only score target instances, skip anchor
-            if base != self.current_target:
-                continue
+        genuineness_scores = {}
 
+        for safe_name in target_names:
             safe_score = safe_scores.get(safe_name, 0)
-            safe_area = (safe_mask > 0.5).sum()
+            safe_binary = safe_masks[safe_name] > 0.5
+            safe_area = int(safe_binary.sum())
             if safe_area == 0:
                 continue
 
             # Find max overlapping distractor score
             max_dist_score = 0.0
             max_dist_name = None
-            for dist_name, dist_mask in distractor_masks.items():
-                intersection = np.logical_and(safe_mask > 0.5, dist_mask > 0.5).sum()
-                union = np.logical_or(safe_mask > 0.5, dist_mask > 0.5).sum()
-                if union == 0:
-                    continue
+            for dist_name, dist_binary, dist_area in dist_binaries:
+                intersection = int(np.count_nonzero(safe_binary & dist_binary))
+                union = safe_area + dist_area - intersection
                 iou = intersection / union
                 if iou > 0.3:
                     dist_score = distractor_scores.get(dist_name, 0)
@@ -307,9 +363,10 @@ class CGVDWrapper(gym.Wrapper):
 
             genuineness = safe_score - max_dist_score
             genuineness_scores[safe_name] = genuineness
-            self._log(f"[CGVD] Cross-val: '{safe_name}' (score={safe_score:.3f}) "
-                      f"genuineness={genuineness:.3f} "
-                      f"(best distractor overlap: '{max_dist_name}', score={max_dist_score:.3f})")
+            if self._logging_enabled:
+                self._log(f"[CGVD] Cross-val: '{safe_name}' (score={safe_score:.3f}) "
+                          f"genuineness={genuineness:.3f} "
+                          f"(best distractor overlap: '{max_dist_name}', score={max_dist_score:.3f})")
 
         return genuineness_scores
 
@@ -320,22 +377,23 @@ class CGVDWrapper(gym.Wrapper):
             target_mask: Binary mask for this frame's target detection
         """
         new_binary = (target_mask > 0.5)
-        if new_binary.sum() < self.min_component_pixels:
+        if np.count_nonzero(new_binary) < self.min_component_pixels:
             return  # Too small to be meaningful
 
         if self.cached_target_mask is None:
             # First detection: initialize anchor
-            self.cached_target_mask = target_mask.copy()
+            self.cached_target_mask = target_mask.astype(np.float32)
             self._target_votes = new_binary.astype(np.float32)
             self._log("[CGVD] Layer 2: target anchor initialized")
             return
 
-        self.cached_target_mask = np.maximum(self.cached_target_mask, target_mask)
+        np.maximum(self.cached_target_mask, target_mask, out=self.cached_target_mask)
         if self._target_votes is None:
             self._target_votes = new_binary.astype(np.float32)
         else:
             self._target_votes += new_binary.astype(np.float32)
-        self._log(f"[CGVD] Layer 2: accumulated (frame={self.frame_count})")
+        if self._logging_enabled:
+            self._log(f"[CGVD] Layer 2: accumulated (frame={self.frame_count})")
 
     def _cleanup_target_mask(self):
         """Post-warmup cleanup: keep only the best target component (Layer 3).
@@ -382,7 +440,7 @@ class CGVDWrapper(gym.Wrapper):
             best_genuine_name = None
             best_safe_score = 0.0
             for inst_name, inst_mask in self.safe_individual_masks.items():
-                base = inst_name.rsplit('_', 1)[0] if '_' in inst_name and inst_name.rsplit('_', 1)[1].isdigit() else inst_name
+                base = _instance_base_name(inst_name)
                 if base != self.current_target:
                     continue
                 # Check if this instance overlaps the component
@@ -466,6 +524,10 @@ class CGVDWrapper(gym.Wrapper):
         self.last_robot_mask = None
         self.cached_robot_mask = None
         self.current_safe_mask = None
+        self._safe_halo = None
+        self._safe_halo_src = None
+        self._feather_src = None
+        self._feather_blur = None
         self._target_votes = None
         self._anchor_votes = None
         self._instance_genuineness = {}
@@ -620,23 +682,46 @@ class CGVDWrapper(gym.Wrapper):
             in_warmup or  # Warm-up period: accumulate detections
             (not self.cache_distractor_once and self.frame_count % self.update_freq == 0)
         )
-        if should_recompute:
-            raw_distractor_mask = self.segmenter.segment(
-                safe_query_image, distractor_concepts, presence_threshold=self.distractor_presence_threshold
+        # Safe-set (target + anchor) is queried on the same image whenever it
+        # is still accumulating; batch it with the distractor query so the
+        # segmenter shares the image encoding and any overlapping concepts.
+        query_safeset = not self.disable_safeset and (self.cached_safe_mask is None or in_warmup)
+        if query_safeset:
+            safe_concepts = self.parser.build_concept_prompt(
+                self.current_target,
+                self.current_anchor,
+                include_robot=False,  # Robot tracked separately
             )
-            self.distractor_scores = self.segmenter.last_scores.copy()
-            self.distractor_individual_masks = self.segmenter.last_individual_masks.copy()
+        safeset_result = None
+
+        if should_recompute:
+            if query_safeset:
+                distractor_result, safeset_result = self.segmenter.segment_many(
+                    safe_query_image,
+                    [distractor_concepts, safe_concepts],
+                    [self.distractor_presence_threshold, self.presence_threshold],
+                )
+                raw_distractor_mask, self.distractor_scores, self.distractor_individual_masks = distractor_result
+            else:
+                raw_distractor_mask = self.segmenter.segment(
+                    safe_query_image, distractor_concepts, presence_threshold=self.distractor_presence_threshold
+                )
+                # Segmenters build fresh dicts per call, so no defensive copy
+                self.distractor_scores = self.segmenter.last_scores
+                self.distractor_individual_masks = self.segmenter.last_individual_masks
 
-            # Log distractor scores
-            scores_str = ", ".join(f"{k}={v:.3f}" for k, v in self.distractor_scores.items())
-            self._log(f"[CGVD] Frame {self.frame_count} Distractor scores: {scores_str}")
+            # Log distractor scores (skip formatting when nothing is logged)
+            if self._logging_enabled:
+                scores_str = ", ".join(f"{k}={v:.3f}" for k, v in self.distractor_scores.items())
+                self._log(f"[CGVD] Frame {self.frame_count} Distractor scores: {scores_str}")
 
             if self.cached_distractor_mask is None:
                 # First frame: initialize
                 self.cached_distractor_mask = raw_distractor_mask
             elif in_warmup:
-                # Warm-up frames: accumulate (union of all detections)
-                self.cached_distractor_mask = np.maximum(self.cached_distractor_mask, raw_distractor_mask)
+                # Warm-up frames: accumulate (union of all detections) in place;
+                # the cache owns its buffer (segmenters return a fresh mask per call)
+                np.maximum(self.cached_distractor_mask, raw_distractor_mask, out=self.cached_distractor_mask)
             else:
                 # Post-warmup recompute (when cache_distractor_once=False)
                 self.cached_distractor_mask = raw_distractor_mask
@@ -659,22 +744,18 @@ class CGVDWrapper(gym.Wrapper):
                 print("[CGVD] Ablation: Safe-set DISABLED (no target/anchor protection)")
         else:
             # Step 3a: Target + anchor mask - accumulate during warm-up period
-            in_warmup = self.frame_count < self.safeset_warmup_frames
-            if self.cached_safe_mask is None or in_warmup:
-                safe_concepts = self.parser.build_concept_prompt(
-                    self.current_target,
-                    self.current_anchor,
-                    include_robot=False,  # Robot tracked separately
-                )
-
+            if query_safeset:
                 # safe_query_image was set earlier: robot-free during warmup,
                 # raw observation otherwise.
 
-                raw_target_mask = self.segmenter.segment(
-                    safe_query_image, safe_concepts, presence_threshold=self.presence_threshold
-                )
-                self.safe_scores = self.segmenter.last_scores.copy()
-                self.safe_individual_masks = self.segmenter.last_individual_masks.copy()
+                if safeset_result is not None:
+                    raw_target_mask, self.safe_scores, self.safe_individual_masks = safeset_result
+                else:
+                    raw_target_mask = self.segmenter.segment(
+                        safe_query_image, safe_concepts, presence_threshold=self.presence_threshold
+                    )
+                    self.safe_scores = self.segmenter.last_scores
+                    self.safe_individual_masks = self.segmenter.last_individual_masks
 
                 # Cross-validate: compute genuineness scores (no removal).
                 # Scores are stored for Layer 3 connected-component scoring.
@@ -684,21 +765,26 @@ class CGVDWrapper(gym.Wrapper):
                 )
                 self._instance_genuineness.update(genuineness_scores)
 
-                scores_str = ", ".join(f"{k}={v:.3f}" for k, v in self.safe_scores.items())
-                self._log(f"[CGVD] Frame {self.frame_count} Safe-set scores: {scores_str}")
+                if self._logging_enabled:
+                    scores_str = ", ".join(f"{k}={v:.3f}" for k, v in self.safe_scores.items())
+                    self._log(f"[CGVD] Frame {self.frame_count} Safe-set scores: {scores_str}")
 
                 # Split by concept and accumulate ALL instances per-concept
                 for name, mask in self.safe_individual_masks.items():
-                    base = name.rsplit('_', 1)[0] if '_' in name and name.rsplit('_', 1)[1].isdigit() else name
+                    base = _instance_base_name(name)
                     if base == self.current_target:
-                        self._accumulate_target(mask)
+                        # Score 0.0 means no instance passed the presence
+                        # threshold (empty mask): skip the full-frame size
+                        # check in _accumulate_target
+                        if self.safe_scores.get(name, 0.0) > 0.0:
+                            self._accumulate_target(mask)
                     else:
                         # Anchor: accumulate unconditionally (never filtered)
                         if self.cached_anchor_mask is None:
-                            self.cached_anchor_mask = mask.copy()
+                            self.cached_anchor_mask = mask.astype(np.float32)
                             self._anchor_votes = (mask > 0.5).astype(np.float32)
                         else:
-                            self.cached_anchor_mask = np.maximum(self.cached_anchor_mask, mask)
+                            np.maximum(self.cached_anchor_mask, mask, out=self.cached_anchor_mask)
                             self._anchor_votes += (mask > 0.5).astype(np.float32)
 
                 # Recompute combined safe mask from per-concept masks
@@ -733,7 +819,7 @@ class CGVDWrapper(gym.Wrapper):
                     if self.cached_robot_mask is None:
                         self.cached_robot_mask = robot_mask.copy()
                     else:
-                        self.cached_robot_mask = np.maximum(self.cached_robot_mask, robot_mask)
+                        np.maximum(self.cached_robot_mask, robot_mask, out=self.cached_robot_mask)
                 # Combine cached target+anchor with fresh robot mask
                 safe_mask = np.maximum(self.cached_safe_mask, robot_mask)
                 if self.verbose:
@@ -875,8 +961,25 @@ class CGVDWrapper(gym.Wrapper):
         Returns:
             Composited image (H, W, 3) uint8
         """
+        # Nothing detected to remove: every path below reduces to the live frame
+        if not mask.any() and (
+            self.cached_distractor_mask is None or not (self.cached_distractor_mask > 0.5).any()
+        ):
+            return image.copy()
+
         if self.blend_sigma > 0:
-            feathered = cv2.GaussianBlur(mask, (0, 0), sigmaX=self.blend_sigma, sigmaY=self.blend_sigma)
+            # The compositing mask is rebuilt every frame but stays the same
+            # once the cached masks freeze after warmup: blur it only when it
+            # changes, then work on a reused copy (updated in place below)
+            if self._feather_src is None or not np.array_equal(mask, self._feather_src):
+                self._feather_blur = cv2.GaussianBlur(
+                    mask, (0, 0), sigmaX=self.blend_sigma, sigmaY=self.blend_sigma,
+                )
+                self._feather_src = mask
+            if self._feather_buf is None or self._feather_buf.shape != mask.shape:
+                self._feather_buf = np.empty(mask.shape, dtype=np.float32)
+            feathered = self._feather_buf
+            np.copyto(feathered, self._feather_blur)
 
             safe = self.current_safe_mask if self.current_safe_mask is not None else self.cached_safe_mask
 
@@ -885,22 +988,8 @@ class CGVDWrapper(gym.Wrapper):
             if safe is not None:
                 safe = (safe > 0.5).astype(np.float32)
 
-            # Binary target/anchor mask — immune to soft-value leakage from SAM3.
-            # Stationary objects with crisp boundaries get hard 0/1 protection.
-            binary_target = (
-                (self.cached_safe_mask > 0.5).astype(np.float32)
-                if self.cached_safe_mask is not None
-                else np.zeros(feathered.shape, dtype=np.float32)
-            )
-
-            # Dilate binary_target beyond cached_mask boundary by ~2σ of
-            # blend_sigma so GaussianBlur feathered values are negligible (<2%)
-            # at the re-enforcement edge, eliminating table-color outline.
-            if self.safe_dilation > 0 and binary_target.max() > 0:
-                _target_kern = np.ones((self._reinforce_size, self._reinforce_size), np.uint8)
-                binary_target = cv2.dilate(
-                    binary_target.astype(np.uint8), _target_kern, iterations=1
-                ).astype(np.float32)
+            # Binary target/anchor mask, dilated (see _get_safe_halo)
+            binary_target = self._get_safe_halo(feathered.shape)
 
             # Mechanism 2: Clamp feathered at distractor pixels outside target.
             # With robot decoupled from cached_mask, we only gate by binary_target
@@ -915,7 +1004,7 @@ class CGVDWrapper(gym.Wrapper):
                     non_safe_distractor = binary_distractor * (1.0 - binary_target)
                 else:
                     non_safe_distractor = binary_distractor
-                feathered = np.maximum(feathered, non_safe_distractor)
+                np.maximum(feathered, non_safe_distractor, out=feathered)
 
             # Re-enforce safe-set pixels so they always show the live frame.
             # safe (binarized) includes target+anchor+robot from SAM3; binary_target
@@ -924,16 +1013,56 @@ class CGVDWrapper(gym.Wrapper):
             # so the 1-2px SAM3 boundary under-segmentation is imperceptible.
             if safe is not None:
                 reinforce_mask = np.maximum(safe, binary_target)
-                feathered = feathered * (1.0 - reinforce_mask)
-
-            feathered_3d = feathered[..., None]
-            return (feathered_3d * inpainted.astype(np.float32) +
-                    (1.0 - feathered_3d) * image.astype(np.float32)).astype(np.uint8)
+                feathered *= np.subtract(1.0, reinforce_mask, out=reinforce_mask)
+
+            # Only the feathered transition band needs a float blend; pixels at
+            # exactly 0 / 1 are the live frame / inpainted background as-is.
+            # Clip first so blur rounding just outside [0, 1] cannot fall
+            # outside both the band and the exact-0/1 selection.
+            np.clip(feathered, 0.0, 1.0, out=feathered)
+            composite = np.where((feathered >= 1.0)[..., None], inpainted, image)
+            band = (feathered > 0.0) & (feathered < 1.0)
+            if band.any():
+                f = feathered[band][:, None]
+                composite[band] = (f * inpainted[band].astype(np.float32) +
+                                   (1.0 - f) * image[band].astype(np.float32)).astype(np.uint8)
+            return composite
         else:
             # Hard compositing (original behavior, sigma=0)
             mask_3d = mask[..., None] > 0.5
             return np.where(mask_3d, inpainted, image)
 
+    def _get_safe_halo(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """Binary target/anchor mask used to gate compositing.
+
+        Binarized so it is immune to soft-value leakage from SAM3: stationary
+        objects with crisp boundaries get hard 0/1 protection. Dilated beyond
+        the cached_mask boundary by ~2σ of blend_sigma so GaussianBlur
+        feathered values are negligible (<2%) at the re-enforcement edge,
+        eliminating table-color outline.
+
+        cached_safe_mask is replaced, never modified in place, once it
+        changes, so the result is reused until it does (it is frozen after
+        warmup). Callers must not modify the returned array.
+
+        Args:
+            shape: Mask shape (H, W), used when there is no safe set yet
+
+        Returns:
+            Float32 {0, 1} mask (H, W)
+        """
+        if self.cached_safe_mask is None:
+            return np.zeros(shape, dtype=np.float32)
+        if self._safe_halo_src is not self.cached_safe_mask:
+            binary_target = (self.cached_safe_mask > 0.5).astype(np.float32)
+            if self.safe_dilation > 0 and binary_target.max() > 0:
+                binary_target = cv2.dilate(
+                    binary_target.astype(np.uint8), self._reinforce_kernel, iterations=1
+                ).astype(np.float32)
+            self._safe_halo = binary_target
+            self._safe_halo_src = self.cached_safe_mask
+        return self._safe_halo
+
     def _build_inpaint_mask(self) -> np.ndarray:
         """Build inpainting mask: distractors + robot.
 
@@ -952,9 +1081,8 @@ class CGVDWrapper(gym.Wrapper):
             # cached_mask leaves un-inpainted pixels that retain stale
             # robot arm color after the arm moves away.
             if self.safe_dilation > 0:
-                kern = np.ones((self._reinforce_size, self._reinforce_size), np.uint8)
                 robot = cv2.dilate(
-                    (robot > 0.5).astype(np.uint8), kern, iterations=1
+                    (robot > 0.5).astype(np.uint8), self._reinforce_kernel, iterations=1
                 ).astype(np.float32)
             mask = np.maximum(mask, robot)
         return mask
@@ -973,10 +1101,11 @@ class CGVDWrapper(gym.Wrapper):
         if not mask_binary.any():
             return image.copy()
 
-        # Compute mean color of non-masked regions
-        visible_mask = ~mask_binary
-        if visible_mask.any():
-            mean_color = image[visible_mask].mean(axis=0).astype(np.uint8)
+        # Compute mean color of non-masked regions (masked reduction in
+        # OpenCV, no gathered copy of the visible pixels)
+        visible_mask = (~mask_binary).view(np.uint8)
+        if cv2.countNonZero(visible_mask):
+            mean_color = np.array(cv2.mean(image, mask=visible_mask)[:3]).astype(np.uint8)
         else:
             mean_color = np.array([128, 128, 128], dtype=np.uint8)
 
@@ -985,6 +1114,59 @@ class CGVDWrapper(gym.Wrapper):
         result[mask_binary] = mean_color
         return result
 
+    def _draw_instance_overlays(
+        self,
+        panel: np.ndarray,
+        masks: Dict[str, np.ndarray],
+        scores: Dict[str, float],
+        fill_color: Tuple[int, int, int],
+        edge_color: Tuple[int, int, int],
+        text_color: Tuple[int, int, int],
+        alpha: float,
+    ):
+        """Draw per-instance detections onto a debug panel in place.
+
+        All instances are tinted in a single blend over the union of their
+        masks (instead of one full-panel blend per instance), then each gets
+        its morphological outline and a "name:score" label at its centroid.
+
+        Args:
+            panel: RGB panel to draw on (modified in place)
+            masks: Instance masks {name: mask}
+            scores: Instance scores {name: score}
+            fill_color: Overlay tint (RGB)
+            edge_color: Outline color (RGB)
+            text_color: Label color (RGB)
+            alpha: Tint opacity
+        """
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        union = np.zeros(panel.shape[:2], dtype=bool)
+        kept = []
+        for name, ind_mask in masks.items():
+            mask_bin = (ind_mask > 0.5).astype(np.uint8)
+            if np.count_nonzero(mask_bin) < 10:
+                continue
+            union |= mask_bin.view(bool)
+            kept.append((name, mask_bin))
+        if not kept:
+            return
+
+        panel[union] = (
+            panel[union].astype(np.float32) * (1 - alpha)
+            + np.array(fill_color, dtype=np.float32) * alpha
+        ).astype(np.uint8)
+
+        for name, mask_bin in kept:
+            _draw_outline(panel, mask_bin, edge_color)
+            # Centroid from image moments (no per-pixel index arrays); m00 is
+            # at least 10 after the size filter above
+            m = cv2.moments(mask_bin, binaryImage=True)
+            cx, cy = int(m["m10"] / m["m00"]), int(m["m01"] / m["m00"])
+            label = f"{name}:{scores.get(name, 0):.2f}"
+            (tw, th), _ = cv2.getTextSize(label, font, 0.35, 1)
+            cv2.rectangle(panel, (cx - 2, cy - th - 3), (cx + tw + 2, cy + 3), (0, 0, 0), -1)
+            cv2.putText(panel, label, (cx, cy), font, 0.35, text_color, 1)
+
     def _save_debug_images(
         self,
         original: np.ndarray,
@@ -1024,85 +1206,50 @@ class CGVDWrapper(gym.Wrapper):
             # ── Panel 2: Distractor Detections (overlaid on SAM3 query image) ──
             panel2 = sam3_base.copy()
 
-            for name, ind_mask in self.distractor_individual_masks.items():
-                score = self.distractor_scores.get(name, 0)
-                mask_bin = (ind_mask > 0.5).astype(np.uint8)
-                if mask_bin.sum() < 10:
-                    continue
-                where = mask_bin > 0
-                panel2[where] = (
-                    panel2[where].astype(np.float32) * (1 - overlay_alpha)
-                    + np.array([255, 60, 60], dtype=np.float32) * overlay_alpha
-                ).astype(np.uint8)
-                contours, _ = cv2.findContours(mask_bin, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                cv2.drawContours(panel2, contours, -1, (255, 0, 0), 1)
-                ys, xs = np.where(where)
-                cx, cy = int(xs.mean()), int(ys.mean())
-                label = f"{name}:{score:.2f}"
-                (tw, th), _ = cv2.getTextSize(label, font, 0.35, 1)
-                cv2.rectangle(panel2, (cx - 2, cy - th - 3), (cx + tw + 2, cy + 3), (0, 0, 0), -1)
-                cv2.putText(panel2, label, (cx, cy), font, 0.35, (255, 120, 120), 1)
+            self._draw_instance_overlays(
+                panel2, self.distractor_individual_masks, self.distractor_scores,
+                fill_color=(255, 60, 60), edge_color=(255, 0, 0), text_color=(255, 120, 120),
+                alpha=overlay_alpha,
+            )
 
             # Accumulated distractor contour (thick)
-            if (self.cached_distractor_mask > 0.5).any():
-                contours, _ = cv2.findContours(
-                    (self.cached_distractor_mask > 0.5).astype(np.uint8),
-                    cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
-                )
-                cv2.drawContours(panel2, contours, -1, (255, 0, 0), 2)
+            distractor_bin = (self.cached_distractor_mask > 0.5).astype(np.uint8)
+            if distractor_bin.any():
+                _draw_outline(panel2, distractor_bin, (255, 0, 0), thickness=2)
 
             # ── Panel 3: Safe-set Detections (overlaid on SAM3 query image) ──
             panel3 = sam3_base.copy()
 
             # Target/anchor individual masks — GREEN overlay
-            for name, ind_mask in self.safe_individual_masks.items():
-                score = self.safe_scores.get(name, 0)
-                mask_bin = (ind_mask > 0.5).astype(np.uint8)
-                if mask_bin.sum() < 10:
-                    continue
-                where = mask_bin > 0
-                panel3[where] = (
-                    panel3[where].astype(np.float32) * (1 - overlay_alpha)
-                    + np.array([60, 255, 60], dtype=np.float32) * overlay_alpha
-                ).astype(np.uint8)
-                contours, _ = cv2.findContours(mask_bin, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                cv2.drawContours(panel3, contours, -1, (0, 255, 0), 1)
-                ys, xs = np.where(where)
-                cx, cy = int(xs.mean()), int(ys.mean())
-                label = f"{name}:{score:.2f}"
-                (tw, th), _ = cv2.getTextSize(label, font, 0.35, 1)
-                cv2.rectangle(panel3, (cx - 2, cy - th - 3), (cx + tw + 2, cy + 3), (0, 0, 0), -1)
-                cv2.putText(panel3, label, (cx, cy), font, 0.35, (120, 255, 120), 1)
+            self._draw_instance_overlays(
+                panel3, self.safe_individual_masks, self.safe_scores,
+                fill_color=(60, 255, 60), edge_color=(0, 255, 0), text_color=(120, 255, 120),
+                alpha=overlay_alpha,
+            )
 
             # Robot mask — BLUE overlay (separate SAM3 query, shown on safe-set panel)
             if self.last_robot_mask is not None:
                 robot_bin = (self.last_robot_mask > 0.5).astype(np.uint8)
-                if robot_bin.sum() > 10:
+                if np.count_nonzero(robot_bin) > 10:
                     where = robot_bin > 0
                     panel3[where] = (
                         panel3[where].astype(np.float32) * 0.7
                         + np.array([80, 130, 255], dtype=np.float32) * 0.3
                     ).astype(np.uint8)
-                    contours, _ = cv2.findContours(robot_bin, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                    cv2.drawContours(panel3, contours, -1, (80, 130, 255), 1)
+                    _draw_outline(panel3, robot_bin, (80, 130, 255))
 
             # Accumulated safe-set contour (thick)
-            if self.cached_safe_mask is not None and (self.cached_safe_mask > 0.5).any():
-                contours, _ = cv2.findContours(
-                    (self.cached_safe_mask > 0.5).astype(np.uint8),
-                    cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
-                )
-                cv2.drawContours(panel3, contours, -1, (0, 255, 0), 2)
+            if self.cached_safe_mask is not None:
+                safe_bin = (self.cached_safe_mask > 0.5).astype(np.uint8)
+                if safe_bin.any():
+                    _draw_outline(panel3, safe_bin, (0, 255, 0), thickness=2)
 
             # ── Panel 4: VLA Input ──
             panel4 = distilled.copy()
             # Draw compositing boundary
-            if (mask > 0.5).any():
-                contours, _ = cv2.findContours(
-                    (mask > 0.5).astype(np.uint8),
-                    cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
-                )
-                cv2.drawContours(panel4, contours, -1, (255, 0, 0), 1)
+            mask_bin = (mask > 0.5).astype(np.uint8)
+            if mask_bin.any():
+                _draw_outline(panel4, mask_bin, (255, 0, 0))
 
             # ── Assemble ──
             comparison = np.hstack([panel1, panel2, panel3, panel4])
@@ -1,8 +1,15 @@
 """Instruction Parser for extracting target and anchor objects from language instructions."""
 
 import re
+from collections import OrderedDict
 from typing import Optional, Tuple
 
+# Strips punctuation, Unicode included (curly quotes, en/em dashes)
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_ARTICLES = frozenset(("a", "an", "the"))
+# Bound for parsed instructions kept per parser
+_PARSE_CACHE_SIZE = 256
+
 
 class InstructionParser:
     """Parses language instructions to extract target and anchor objects.
@@ -32,25 +39,39 @@ class InstructionParser:
     ]
 
     # Common action verbs to strip from noun extraction
-    ACTION_VERBS = [
-        "pick",
-        "place",
-        "put",
-        "move",
-        "stack",
-        "open",
-        "close",
-        "grasp",
-        "grab",
-        "lift",
-        "drop",
-    ]
+    ACTION_VERBS = frozenset(
+        [
+            "pick",
+            "place",
+            "put",
+            "move",
+            "stack",
+            "open",
+            "close",
+            "grasp",
+            "grab",
+            "lift",
+            "drop",
+        ]
+    )
 
     # Prepositions indicating anchor objects
     ANCHOR_PREPOSITIONS = ["on", "in", "into", "onto", "near", "beside", "next to"]
 
+    # Compiled once at class load (parse runs on every new instruction)
+    _TASK_REGEXES = tuple(
+        (re.compile(pattern), objects) for pattern, objects in TASK_PATTERNS
+    )
+    _ANCHOR_REGEXES = tuple(
+        re.compile(rf"{prep}\s+(?:the\s+)?(\w+)") for prep in ANCHOR_PREPOSITIONS
+    )
+    # Set view for per-word membership tests (the list keeps match priority order)
+    _ANCHOR_PREPOSITION_SET = frozenset(ANCHOR_PREPOSITIONS)
+
     def __init__(self):
-        pass
+        # Parsed results by normalized instruction (instructions repeat across
+        # episodes), LRU-bounded to _PARSE_CACHE_SIZE
+        self._cache: OrderedDict = OrderedDict()
 
     def parse(self, instruction: str) -> Tuple[str, Optional[str]]:
         """Parse instruction to extract target and anchor objects.
@@ -62,10 +83,22 @@ class InstructionParser:
             Tuple of (target_object, anchor_object). Anchor may be None.
         """
         text = instruction.lower().strip()
-
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            return cached
+
+        result = self._parse_uncached(text)
+        self._cache[text] = result
+        if len(self._cache) > _PARSE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return result
+
+    def _parse_uncached(self, text: str) -> Tuple[str, Optional[str]]:
+        """Parse a lowercased, stripped instruction."""
         # Try known task patterns first
-        for pattern, (target, anchor) in self.TASK_PATTERNS:
-            if re.search(pattern, text):
+        for regex, (target, anchor) in self._TASK_REGEXES:
+            if regex.search(text):
                 return (target, anchor)
 
         # Fallback: extract nouns heuristically
@@ -83,20 +116,20 @@ class InstructionParser:
 
         for i, word in enumerate(words):
             # Skip articles
-            if word in ["a", "an", "the"]:
+            if word in _ARTICLES:
                 continue
             # Skip action verbs
             if word in self.ACTION_VERBS:
                 continue
             # Skip prepositions and their following words
-            if word in self.ANCHOR_PREPOSITIONS:
+            if word in self._ANCHOR_PREPOSITION_SET:
                 skip_next = True
                 continue
             if skip_next:
                 skip_next = False
                 continue
             # Clean punctuation
-            clean_word = re.sub(r"[^\w\s]", "", word)
+            clean_word = _PUNCT_RE.sub("", word)
             if clean_word and len(clean_word) > 1:
                 filtered.append(clean_word)
 
@@ -110,9 +143,8 @@ class InstructionParser:
     def _extract_anchor(self, text: str) -> Optional[str]:
         """Extract the anchor object (destination/reference)."""
         # Look for patterns like "in basket", "on plate", etc.
-        for prep in self.ANCHOR_PREPOSITIONS:
-            pattern = rf"{prep}\s+(?:the\s+)?(\w+)"
-            match = re.search(pattern, text)
+        for regex in self._ANCHOR_REGEXES:
+            match = regex.search(text)
             if match:
                 anchor = match.group(1)
                 # Skip if it's a verb or too short
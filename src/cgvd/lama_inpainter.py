@@ -1,5 +1,6 @@
 """LaMa-based inpainting for CGVD distractor removal."""
 
+import threading
 import time
 from typing import Optional
 
@@ -8,6 +9,7 @@ import numpy as np
 
 # Module-level singleton for sharing across CGVDWrapper instances
 _lama_singleton: Optional["LamaInpainter"] = None
+_lama_lock = threading.Lock()
 
 
 def get_lama_inpainter(device: str = "cuda") -> "LamaInpainter":
@@ -24,18 +26,23 @@ def get_lama_inpainter(device: str = "cuda") -> "LamaInpainter":
     """
     global _lama_singleton
 
+    # Double-checked locking so concurrent first calls load the model once
     if _lama_singleton is None:
-        _lama_singleton = LamaInpainter(device=device)
-        # Force lazy initialization to load the model now
-        _lama_singleton._load_model()
-        print("[LaMa] Created singleton LamaInpainter")
+        with _lama_lock:
+            if _lama_singleton is None:
+                inpainter = LamaInpainter(device=device)
+                # Force lazy initialization to load the model now
+                inpainter._load_model()
+                _lama_singleton = inpainter
+                print("[LaMa] Created singleton LamaInpainter")
     return _lama_singleton
 
 
 def clear_lama_singleton():
     """Clear the singleton instance (useful for testing or memory cleanup)."""
     global _lama_singleton
-    _lama_singleton = None
+    with _lama_lock:
+        _lama_singleton = None
 
 
 class LamaInpainter:
@@ -50,6 +57,13 @@ class LamaInpainter:
         self.device = device
         self._model = None
 
+        # Reused across calls: dilation kernels by size, mask buffers by shape.
+        # The instance is a shared singleton, so the buffers are guarded by a lock
+        self._kernels = {}
+        self._mask_buf: Optional[np.ndarray] = None
+        self._dilated_buf: Optional[np.ndarray] = None
+        self._buf_lock = threading.Lock()
+
         # Timing instrumentation
         self.last_inpaint_time: float = 0.0
 
@@ -74,25 +88,41 @@ class LamaInpainter:
             dilate_mask: Pixels to dilate mask (helps cover shadows/edges)
 
         Returns:
-            Inpainted image [H, W, 3] uint8
+            Inpainted image [H, W, 3] uint8 (may be read-only; copy before
+            modifying in place)
         """
         start_time = time.time()
 
         self._load_model()
 
-        # Convert mask to uint8 (LaMa expects 0-255)
-        mask_uint8 = (mask * 255).astype(np.uint8)
-
-        # Optional: dilate mask slightly for cleaner edges
-        if dilate_mask > 0:
-            import cv2
-
-            kernel = np.ones((dilate_mask, dilate_mask), np.uint8)
-            mask_uint8 = cv2.dilate(mask_uint8, kernel, iterations=1)
-
-        # Run LaMa inpainting
-        result = self._model(image, mask_uint8)
+        # The buffers stay in use until LaMa has consumed the mask
+        with self._buf_lock:
+            # Convert mask to uint8 (LaMa expects 0-255) into a reused buffer
+            if self._mask_buf is None or self._mask_buf.shape != mask.shape:
+                self._mask_buf = np.empty(mask.shape, dtype=np.uint8)
+                self._dilated_buf = np.empty(mask.shape, dtype=np.uint8)
+            mask_uint8 = np.multiply(mask, 255, out=self._mask_buf, casting="unsafe")
+
+            # Optional: dilate mask slightly for cleaner edges
+            if dilate_mask > 0:
+                import cv2
+
+                kernel = self._kernels.get(dilate_mask)
+                if kernel is None:
+                    kernel = cv2.getStructuringElement(
+                        cv2.MORPH_RECT, (dilate_mask, dilate_mask)
+                    )
+                    self._kernels[dilate_mask] = kernel
+                mask_uint8 = cv2.dilate(
+                    mask_uint8, kernel, dst=self._dilated_buf, iterations=1
+                )
+
+            # Run LaMa inpainting
+            result = self._model(image, mask_uint8)
 
         self.last_inpaint_time = time.time() - start_time
 
-        return np.array(result)
+        # SimpleLama returns a PIL image; asarray skips np.array's extra copy
+        if isinstance(result, np.ndarray):
+            return result
+        return np.asarray(result)
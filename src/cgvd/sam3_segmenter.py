@@ -1,7 +1,14 @@
 """SAM 3 Segmenter for concept-driven visual grounding."""
 
+import atexit
+import hashlib
 import os
+import select
+import sys
+import threading
 import time
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -9,6 +16,59 @@ import numpy as np
 import torch
 from PIL import Image
 
+# Bounds for the text-embedding caches (per concept / per concept set)
+_TEXT_EMBED_CACHE_SIZE = 256
+_TEXT_BATCH_CACHE_SIZE = 64
+# Bound for captured decode graphs (per concept set); each holds a memory pool
+_GRAPH_CACHE_SIZE = 16
+
+
+@lru_cache(maxsize=64)
+def _split_concepts(concepts: str) -> Tuple[str, ...]:
+    """Split a dot-separated concept string (memoized, prompts repeat per frame).
+
+    Concepts are interned: they become dict keys for scores and masks on
+    every call, and interned keys hash and compare by identity.
+    """
+    if "." not in concepts:
+        concept = concepts.strip()
+        return (sys.intern(concept),) if concept else ()
+    return tuple(sys.intern(p) for p in map(str.strip, concepts.split(".")) if p)
+
+
+def _expand_batch(model_output, n: int):
+    """Broadcast a batch-1 model output (tensors and tuples of tensors) to batch n without copying."""
+    expanded = {}
+    for key, value in model_output.items():
+        if isinstance(value, torch.Tensor):
+            expanded[key] = value.expand(n, *value.shape[1:])
+        elif isinstance(value, tuple):
+            expanded[key] = tuple(t.expand(n, *t.shape[1:]) for t in value)
+        else:
+            expanded[key] = value
+    return type(model_output)(**expanded)
+
+
+def _clone_output(model_output):
+    """Copy a model output's tensors (including tuples of tensors) into fresh storage."""
+    return type(model_output)(**{
+        key: value.clone() if isinstance(value, torch.Tensor)
+        else tuple(t.clone() for t in value) if isinstance(value, tuple)
+        else value
+        for key, value in model_output.items()
+    })
+
+
+def _output_tensors(model_output) -> List[torch.Tensor]:
+    """Flatten a model output's tensors (including tuples of tensors) in key order."""
+    tensors = []
+    for value in model_output.values():
+        if isinstance(value, torch.Tensor):
+            tensors.append(value)
+        elif isinstance(value, tuple):
+            tensors.extend(t for t in value if isinstance(t, torch.Tensor))
+    return tensors
+
 
 class SAM3Segmenter:
     """Segments images using SAM 3 with text prompts.
@@ -17,57 +77,158 @@ class SAM3Segmenter:
     to perform text-prompted instance segmentation.
 
     Note: SAM3 expects SINGLE concepts per query (e.g., "spoon", "towel").
-    For multiple concepts, we query each separately and combine masks.
+    For multiple concepts, each is a separate prompt in one batched forward
+    and the masks are combined.
+
+    Per-instance masks share one host buffer per concept; callers must treat
+    returned masks as read-only (copy before modifying in place).
     """
 
     def __init__(
         self,
         model_name: str = "facebook/sam3",
         device: Optional[str] = None,
-        dtype: torch.dtype = torch.float16,
+        dtype: Optional[torch.dtype] = None,
         presence_threshold: float = 0.5,
         mask_threshold: float = 0.3,
+        compile_model: Optional[bool] = None,
+        vision_cache_size: int = 8,
+        vision_backend: str = "torch",
+        quantization: str = "none",
+        cuda_graphs: bool = False,
+        cudnn_benchmark: Optional[bool] = None,
     ):
         """Initialize SAM3 segmenter.
 
         Args:
             model_name: HuggingFace model identifier for SAM3
             device: Device to run model on (default: auto-detect)
-            dtype: Model dtype (default: float16 for efficiency)
+            dtype: Model dtype (default: bfloat16 on Ampere+ GPUs, else float16)
             presence_threshold: Minimum confidence to accept a mask (hallucination check)
             mask_threshold: Threshold for binarizing predicted masks
+            compile_model: torch.compile the vision encoder and the text-conditioned
+                decode (DETR encoder/decoder, scoring, mask head) with CUDA graphs
+                via mode="reduce-overhead"; the vision encoder is warmed up at
+                load, first decode calls per concept count are slow
+                (default: on if the CGVD_SAM3_COMPILE env var is "1")
+            vision_cache_size: Number of recent frames whose vision embeddings
+                are kept on device for reuse (0 disables the cache)
+            vision_backend: "torch" (eager, or torch.compile with compile_model)
+                or "tensorrt" to build an FP16 TensorRT engine for the vision
+                encoder via torch_tensorrt (CUDA only; text tower and decoders
+                stay in PyTorch)
+            quantization: Weight-only quantization of the Linear layers via
+                bitsandbytes: "none", "int8" (halves weight memory) or "nf4"
+                (quarters it and also lowers peak inference VRAM). Activations
+                stay in ``dtype``; norms, embeddings and convs are untouched.
+            cuda_graphs: Capture the batched detector/mask decode as a CUDA
+                graph per concept set and replay it on later frames (CUDA
+                only; ignored with compile_model, which already captures graphs)
+            cudnn_benchmark: Set torch.backends.cudnn.benchmark at load so cuDNN
+                autotunes the vision encoder's convs for its fixed input size.
+                The flag is process-global (it also changes kernel selection
+                and run-to-run determinism of a policy in the same process),
+                so it is opt-in (default: on if the CGVD_SAM3_CUDNN_BENCHMARK
+                env var is "1")
         """
+        if vision_backend not in ("torch", "tensorrt"):
+            raise ValueError(f"Unknown vision_backend: {vision_backend!r}")
+        if quantization not in ("none", "int8", "nf4"):
+            raise ValueError(f"Unknown quantization: {quantization!r}")
+        if quantization != "none" and vision_backend == "tensorrt":
+            raise ValueError("quantization is not supported with vision_backend='tensorrt'")
         self.model_name = model_name
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        if vision_backend == "tensorrt" and not self.device.startswith("cuda"):
+            raise ValueError(f"vision_backend='tensorrt' requires a CUDA device, got {self.device!r}")
+        if dtype is None:
+            # bf16 has fp32's range (no overflow risk) at fp16's cost on Ampere+
+            use_bf16 = self.device.startswith("cuda") and torch.cuda.get_device_capability(self.device)[0] >= 8
+            dtype = torch.bfloat16 if use_bf16 else torch.float16
         self.dtype = dtype
         self.presence_threshold = presence_threshold
         self.mask_threshold = mask_threshold
+        if compile_model is None:
+            # CGVDWrapper builds the segmenter itself; the env var lets
+            # eval runs opt in without threading a flag through every script
+            compile_model = os.environ.get("CGVD_SAM3_COMPILE") == "1"
+        self.compile_model = compile_model
+        if cudnn_benchmark is None:
+            cudnn_benchmark = os.environ.get("CGVD_SAM3_CUDNN_BENCHMARK") == "1"
+        self.cudnn_benchmark = cudnn_benchmark
+        self.vision_cache_size = vision_cache_size
+        self.vision_backend = vision_backend
+        self.quantization = quantization
+        self.cuda_graphs = cuda_graphs
 
         self.processor = None
         self.model = None
         self._initialized = False
-        self._vision_embeds_cache = None
+        self._init_lock = threading.Lock()
+        # frame key -> (vision_embeds, original_sizes), least recently used first
+        self._vision_embeds_cache: OrderedDict = OrderedDict()
+        # concept -> (pooled text features [1, L, D], attention mask [1, L]) on
+        # device, least recently used first; plus assembled batches per concept set
+        self._text_embed_cache: OrderedDict = OrderedDict()
+        self._text_inputs_cache: OrderedDict = OrderedDict()
+        # CUDA only: reused pinned staging buffer and copy stream for input frames
+        self._pinned_frame: Optional[torch.Tensor] = None
+        self._h2d_stream = None
+        # CUDA graphs: static batch-1 vision embeddings the graphs read from,
+        # and concepts -> (graph, static outputs, text inputs), LRU-bounded
+        self._static_vision = None
+        self._graphs: OrderedDict = OrderedDict()
         self.last_scores = {}  # Stores per-concept scores from last segment() call
 
         # Timing instrumentation
         self.last_segment_time: float = 0.0
 
     def _lazy_init(self):
-        """Lazily initialize model and processor on first use."""
+        """Lazily initialize model and processor on first use.
+
+        Thread-safe: concurrent first calls load the model only once.
+        """
         if self._initialized:
             return
+        with self._init_lock:
+            if not self._initialized:
+                self._load_model()
 
+    def _load_model(self):
+        """Load processor and model onto the device (called once by _lazy_init)."""
         try:
             from transformers import Sam3Model, Sam3Processor
-        except ImportError:
+        except ImportError as e:
             raise ImportError(
                 "SAM3 requires transformers >= 5.0.0 (main branch). "
                 "Install with: pip install git+https://github.com/huggingface/transformers.git@main"
-            )
+            ) from e
 
         # Get HuggingFace token for gated model access
         hf_token = os.environ.get("HF_TOKEN")
 
+        model_kwargs = {
+            "torch_dtype": self.dtype,
+            "token": hf_token,
+        }
+        if self.quantization != "none":
+            from transformers import BitsAndBytesConfig
+
+            if self.quantization == "int8":
+                quant_config = BitsAndBytesConfig(load_in_8bit=True)
+            else:
+                quant_config = BitsAndBytesConfig(
+                    load_in_4bit=True,
+                    bnb_4bit_quant_type="nf4",
+                    bnb_4bit_compute_dtype=self.dtype,
+                )
+            model_kwargs["quantization_config"] = quant_config
+            # bitsandbytes quantizes while placing weights, so they must be
+            # loaded onto the device (device_map needs accelerate, which
+            # bitsandbytes loading requires anyway); plain loads use .to()
+            model_kwargs["device_map"] = {"": self.device}
+            print(f"[SAM3] Loading with {self.quantization} weight-only quantization")
+
         # Try local cache first to avoid network timeouts when model is
         # already downloaded.  Fall back to network download if needed.
         try:
@@ -75,19 +236,78 @@ class SAM3Segmenter:
                 self.model_name, token=hf_token, local_files_only=True,
             )
             self.model = Sam3Model.from_pretrained(
-                self.model_name, torch_dtype=self.dtype, token=hf_token,
-                local_files_only=True,
+                self.model_name, local_files_only=True, **model_kwargs,
             )
         except OSError:
             print("[SAM3] Model not in local cache, downloading from HuggingFace Hub...")
             self.processor = Sam3Processor.from_pretrained(
                 self.model_name, token=hf_token,
             )
-            self.model = Sam3Model.from_pretrained(
-                self.model_name, torch_dtype=self.dtype, token=hf_token,
-            )
-        self.model.to(self.device)
+            self.model = Sam3Model.from_pretrained(self.model_name, **model_kwargs)
+        if self.quantization == "none":
+            # channels_last only changes 4D weights (the patch embedding and
+            # FPN convs) and lets cuDNN pick NHWC kernels for them; quantized
+            # weights are already placed and cannot be .to()'d
+            self.model.to(self.device, memory_format=torch.channels_last)
         self.model.eval()
+
+        if self.vision_backend == "tensorrt":
+            try:
+                import torch_tensorrt  # noqa: F401  (registers the "tensorrt" backend)
+            except ImportError as e:
+                raise ImportError(
+                    "vision_backend='tensorrt' requires torch_tensorrt. "
+                    "Install with: pip install torch-tensorrt"
+                ) from e
+            # The ViT is ~80% of a frame; TensorRT fuses it into FP16 tensor
+            # core kernels. The input size is fixed, so the engine is static.
+            print("[SAM3] Building TensorRT FP16 engine for the vision encoder")
+            self.model.vision_encoder.compile(
+                backend="tensorrt",
+                dynamic=False,
+                options={"enabled_precisions": {torch.float16}},
+            )
+
+        if self.compile_model and not hasattr(torch.nn.Module, "compile"):
+            print(f"[SAM3] torch {torch.__version__} has no nn.Module.compile, running eager")
+            self.compile_model = False
+
+        if self.compile_model:
+            # The text-conditioned decode (DETR encoder/decoder, scoring and
+            # mask head) is many small kernels; graph capture removes most of
+            # their launch overhead. Shapes are fixed per concept count (one
+            # image size, 32 text tokens), so each count compiles once.
+            if self.vision_backend == "torch":
+                print("[SAM3] Compiling vision encoder and text-conditioned decode with torch.compile")
+                self.model.vision_encoder.compile(mode="reduce-overhead", dynamic=False)
+            else:
+                print("[SAM3] Compiling text-conditioned decode with torch.compile")
+            for module in (
+                self.model.detr_encoder,
+                self.model.detr_decoder,
+                self.model.dot_product_scoring,
+                self.model.mask_decoder,
+            ):
+                module.compile(mode="reduce-overhead", dynamic=False)
+
+        if self.device.startswith("cuda"):
+            if self.cudnn_benchmark:
+                # The processor always emits one fixed input size, so let cuDNN
+                # benchmark and keep the fastest conv algorithms for it
+                print("[SAM3] Enabling torch.backends.cudnn.benchmark (process-wide)")
+                torch.backends.cudnn.benchmark = True
+
+            # Warm up the vision encoder at that size so kernel selection and
+            # compilation / engine build happen here, not on the first frame
+            size = self.processor.image_processor.size
+            dummy = torch.zeros(
+                1, 3, size["height"], size["width"], device=self.device, dtype=self.dtype,
+            ).contiguous(memory_format=torch.channels_last)
+            warmup_iters = 2 if (self.compile_model or self.vision_backend == "tensorrt") else 1
+            with torch.inference_mode():
+                for _ in range(warmup_iters):
+                    self.model.get_vision_features(pixel_values=dummy)
+
         self._initialized = True
 
     def _parse_concepts(self, concepts: str) -> List[str]:
@@ -99,94 +319,444 @@ class SAM3Segmenter:
         Returns:
             List of individual concepts like ["spoon", "towel", "robot arm"]
         """
-        # Split by dots and clean up
-        parts = concepts.split(".")
-        cleaned = [p.strip() for p in parts if p.strip()]
-        return cleaned
+        return list(_split_concepts(concepts))
 
     def _segment_single_concept(
         self,
-        pil_image: Image.Image,
+        image,
         concept: str,
         vision_embeds=None,
         original_sizes=None,
         presence_threshold: Optional[float] = None,
-    ) -> Tuple[np.ndarray, float]:
+    ) -> Tuple[np.ndarray, float, list]:
         """Segment a single concept from an image.
 
         Args:
-            pil_image: PIL Image
+            image: RGB image, (H, W, 3) uint8 array or PIL Image
             concept: Single concept string (e.g., "spoon")
             vision_embeds: Pre-computed vision embeddings (optional)
-            original_sizes: Original image sizes from processor
+            original_sizes: Original image sizes from processor ([[h, w]] list)
             presence_threshold: Override presence threshold (default: use instance threshold)
 
         Returns:
-            Tuple of (mask, max_score) where mask is (H, W) float32
+            Tuple of (mask, max_score, instance_masks) where masks are (H, W) uint8 {0, 1}
         """
-        h, w = pil_image.size[1], pil_image.size[0]  # PIL is (W, H)
+        if isinstance(image, Image.Image):
+            image = np.asarray(image)
+        h, w = image.shape[:2]
 
         # Use provided threshold or fall back to instance default
         threshold = presence_threshold if presence_threshold is not None else self.presence_threshold
 
-        # If we have vision embeddings, use efficient multi-prompt inference
-        if vision_embeds is not None:
-            text_inputs = self.processor(text=concept, return_tensors="pt")
-            text_inputs = {k: v.to(self.device) for k, v in text_inputs.items()}
+        if vision_embeds is None:
+            img_inputs = self.processor(images=image, return_tensors="pt")
+            original_sizes = img_inputs.get("original_sizes")
+            if original_sizes is not None:
+                original_sizes = original_sizes.tolist()
+            pixel_values = img_inputs["pixel_values"].to(self.device, dtype=self.dtype)
+            with torch.inference_mode():
+                vision_embeds = self.model.get_vision_features(pixel_values=pixel_values)
+
+        return self._segment_concepts({concept: threshold}, vision_embeds, original_sizes, h, w)[concept]
+
+    def _get_text_inputs(self, concepts: Tuple[str, ...]) -> dict:
+        """Model text kwargs for a batch of concepts, encoding each concept once.
+
+        Text encoder outputs are cached per concept string, so a concept is
+        encoded once no matter which concept sets it later appears in. The
+        processor pads every prompt to the same length, so cached rows stack
+        to [N, L]. The batch is passed as ``text_embeds`` (the model still
+        needs ``attention_mask`` for the text mask).
+        """
+        text_inputs = self._text_inputs_cache.get(concepts)
+        if text_inputs is not None:
+            self._text_inputs_cache.move_to_end(concepts)
+            return text_inputs
+
+        embed_cache = self._text_embed_cache
+        missing = [c for c in dict.fromkeys(concepts) if c not in embed_cache]
+        if missing:
+            tokens = self.processor(text=missing, return_tensors="pt").to(self.device)
+            with torch.inference_mode():
+                pooled = self.model.get_text_features(**tokens).pooler_output
+            attention_mask = tokens["attention_mask"]
+            for i, concept in enumerate(missing):
+                embed_cache[concept] = (pooled[i : i + 1], attention_mask[i : i + 1])
+
+        rows = []
+        for concept in concepts:
+            embed_cache.move_to_end(concept)
+            rows.append(embed_cache[concept])
+        from transformers.modeling_outputs import BaseModelOutputWithPooling
+
+        text_inputs = {
+            "attention_mask": torch.cat([mask for _, mask in rows]),
+            "text_embeds": BaseModelOutputWithPooling(
+                pooler_output=torch.cat([feats for feats, _ in rows])
+            ),
+        }
+        self._text_inputs_cache[concepts] = text_inputs
+
+        while len(embed_cache) > _TEXT_EMBED_CACHE_SIZE:
+            embed_cache.popitem(last=False)
+        while len(self._text_inputs_cache) > _TEXT_BATCH_CACHE_SIZE:
+            self._text_inputs_cache.popitem(last=False)
+        return text_inputs
+
+    def _segment_concepts(
+        self,
+        concept_thresholds: Dict[str, float],
+        vision_embeds,
+        original_sizes,
+        h: int,
+        w: int,
+    ) -> Dict[str, tuple]:
+        """Segment several concepts with one batched forward on shared vision embeddings.
+
+        The image embeddings are broadcast (expand, no copy) to one row per
+        concept, so the detector and mask heads run once for all prompts. If
+        the batch runs out of GPU memory it is split in half and retried.
 
-            with torch.no_grad():
-                outputs = self.model(
-                    vision_embeds=vision_embeds,
-                    **text_inputs
-                )
-        else:
-            # Full inference with both image and text
-            inputs = self.processor(
-                images=pil_image,
-                text=concept,
-                return_tensors="pt",
-            )
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            original_sizes = inputs.get("original_sizes")
+        Args:
+            concept_thresholds: concept -> presence threshold
+            vision_embeds: Embeddings from _get_vision_embeds
+            original_sizes: Original image sizes from processor as a [[h, w]]
+                list (None: use h, w)
+            h, w: Image size
+
+        Returns:
+            concept -> (mask, max_score, instance_masks), masks (H, W) uint8 {0, 1}
+        """
+        concepts = tuple(concept_thresholds)
+        if not concepts:
+            return {}
+        n = len(concepts)
 
-            with torch.no_grad():
-                outputs = self.model(**inputs)
+        text_inputs = self._get_text_inputs(concepts)
+        batch_embeds = _expand_batch(vision_embeds, n) if n > 1 else vision_embeds
 
-        # Post-process to get instance masks
-        target_sizes = original_sizes.tolist() if original_sizes is not None else [[h, w]]
+        try:
+            outputs = None
+            if self._use_cuda_graphs():
+                outputs = self._forward_graphed(concepts, vision_embeds, text_inputs)
+            if outputs is None:
+                with torch.inference_mode():
+                    outputs = self.model(vision_embeds=batch_embeds, **text_inputs)
+        except torch.cuda.OutOfMemoryError:
+            if n == 1:
+                raise
+            print(f"[SAM3] OOM on a batch of {n} concepts, splitting in half")
+            del batch_embeds
+            torch.cuda.empty_cache()
+            items = list(concept_thresholds.items())
+            per_concept = self._segment_concepts(
+                dict(items[: n // 2]), vision_embeds, original_sizes, h, w,
+            )
+            per_concept.update(self._segment_concepts(
+                dict(items[n // 2:]), vision_embeds, original_sizes, h, w,
+            ))
+            return per_concept
+
+        # Post-process to get instance masks (one threshold per call, so use
+        # the loosest and filter each concept to its own below)
+        target_sizes = original_sizes if original_sizes is not None else [[h, w]]
         results = self.processor.post_process_instance_segmentation(
             outputs,
-            threshold=threshold,
+            threshold=min(concept_thresholds.values()),
             mask_threshold=self.mask_threshold,
-            target_sizes=target_sizes,
+            target_sizes=target_sizes * n,
+        )
+
+        # Resize and reduce on device, then transfer every concept's masks at once
+        pieces = []  # per concept: kept instance masks followed by their union
+        concept_scores = []
+        for concept, result in zip(concepts, results):
+            if "masks" not in result or len(result["masks"]) == 0:
+                concept_scores.append([])
+                continue
+            if "scores" not in result:
+                raise KeyError("SAM3 post_process returned no 'scores' — check transformers version")
+            scores = result["scores"]
+            # One bulk transfer for all scores instead of a sync per instance
+            scores = scores.tolist() if isinstance(scores, torch.Tensor) else list(scores)
+            keep = [i for i, score in enumerate(scores) if score > concept_thresholds[concept]]
+            concept_scores.append([float(scores[i]) for i in keep])
+            if not keep:
+                continue
+
+            masks = result["masks"]
+            if not isinstance(masks, torch.Tensor):
+                masks = torch.as_tensor(np.asarray(masks))
+            if len(keep) != len(scores):
+                masks = masks[keep]
+            # Binary masks: resize in uint8 (post-process yields int64)
+            masks = masks.to(torch.uint8)
+            if tuple(masks.shape[-2:]) != (h, w):
+                masks = torch.nn.functional.interpolate(
+                    masks.unsqueeze(1), size=(h, w), mode="nearest",
+                ).squeeze(1)
+            pieces.append(masks)
+            pieces.append(masks.amax(dim=0, keepdim=True))
+
+        masks_np = torch.cat(pieces, dim=0).cpu().numpy() if pieces else None
+
+        per_concept = {}
+        offset = 0
+        for concept, scores in zip(concepts, concept_scores):
+            if not scores:
+                per_concept[concept] = (np.zeros((h, w), dtype=np.uint8), 0.0, [])
+                continue
+            count = len(scores)
+            instance_masks = [(masks_np[offset + i], scores[i]) for i in range(count)]
+            per_concept[concept] = (masks_np[offset + count], max(scores), instance_masks)
+            offset += count + 1
+
+        return per_concept
+
+    def _use_cuda_graphs(self) -> bool:
+        return (
+            self.cuda_graphs
+            and not self.compile_model
+            and self.device.startswith("cuda")
+        )
+
+    def _forward_graphed(self, concepts: Tuple[str, ...], vision_embeds, text_inputs):
+        """Run the batched decode by replaying a CUDA graph for this concept set.
+
+        The frame's vision embeddings are copied into static buffers that the
+        graphs read from; the (cached) text inputs are baked into each graph.
+        Graphs are captured on first use and the least recently used one is
+        released beyond _GRAPH_CACHE_SIZE. Returns None to fall back to eager
+        when capture is not possible or shapes differ from the captured ones.
+        """
+        if self._static_vision is None:
+            self._static_vision = _clone_output(vision_embeds)
+        static_tensors = _output_tensors(self._static_vision)
+        frame_tensors = _output_tensors(vision_embeds)
+        if len(static_tensors) != len(frame_tensors) or any(
+            dst.shape != src.shape for dst, src in zip(static_tensors, frame_tensors)
+        ):
+            return None
+        for dst, src in zip(static_tensors, frame_tensors):
+            dst.copy_(src)
+
+        entry = self._graphs.get(concepts)
+        if entry is None:
+            # Evict before capturing so the new graph can reuse the freed pool
+            while len(self._graphs) >= _GRAPH_CACHE_SIZE:
+                _, (old_graph, _, _) = self._graphs.popitem(last=False)
+                old_graph.reset()
+            entry = self._capture_graph(len(concepts), text_inputs)
+            if entry is None:
+                return None
+            self._graphs[concepts] = entry
+        else:
+            self._graphs.move_to_end(concepts)
+        graph, static_outputs, _ = entry
+        graph.replay()
+        return static_outputs
+
+    def _capture_graph(self, n: int, text_inputs):
+        """Capture one batched decode of ``n`` concepts; disables graphs on failure."""
+        static = self._static_vision
+        batch_embeds = _expand_batch(static, n) if n > 1 else static
+        try:
+            with torch.inference_mode():
+                # Warm up on a side stream so lazy allocations happen outside capture
+                side = torch.cuda.Stream(device=self.device)
+                side.wait_stream(torch.cuda.current_stream())
+                with torch.cuda.stream(side):
+                    for _ in range(3):
+                        self.model(vision_embeds=batch_embeds, **text_inputs)
+                torch.cuda.current_stream().wait_stream(side)
+
+                graph = torch.cuda.CUDAGraph()
+                with torch.cuda.graph(graph):
+                    static_outputs = self.model(vision_embeds=batch_embeds, **text_inputs)
+        except RuntimeError as e:
+            self._check_stream_after_failed_capture(e)
+            print(f"[SAM3] CUDA graph capture failed, using eager decode: {e}")
+            self.cuda_graphs = False
+            self._graphs.clear()
+            self._static_vision = None
+            return None
+        print(f"[SAM3] Captured CUDA graph for {n} concept(s)")
+        # Keep text_inputs referenced: the graph reads them by address
+        return graph, static_outputs, text_inputs
+
+    def _check_stream_after_failed_capture(self, error: RuntimeError):
+        """Make sure the eager fallback can run after a failed graph capture.
+
+        A capture that fails part-way can leave the current stream in capture
+        mode or the device with a sticky error, and the eager decode would then
+        fail with an unrelated-looking message. Raise the capture error instead.
+        """
+        if torch.cuda.is_current_stream_capturing():
+            raise RuntimeError(
+                "[SAM3] CUDA graph capture failed and left the stream capturing; "
+                "cannot fall back to eager decode (run with cuda_graphs=False)"
+            ) from error
+        try:
+            torch.cuda.synchronize(self.device)
+        except RuntimeError:
+            raise RuntimeError(
+                "[SAM3] CUDA graph capture failed and left the device unusable; "
+                "cannot fall back to eager decode (run with cuda_graphs=False)"
+            ) from error
+
+    def clear_embed_cache(self):
+        """Drop cached vision embeddings (frees their device memory)."""
+        self._vision_embeds_cache.clear()
+
+    def _upload_frame(self, image: np.ndarray) -> torch.Tensor:
+        """Copy a uint8 HWC frame to the GPU through a reused pinned buffer on a side stream.
+
+        Pinning a fresh tensor every frame costs more than the copy itself, so
+        one staging buffer is kept per frame shape. The compute stream only
+        waits for the copy right before preprocessing needs it.
+        """
+        if self._pinned_frame is None or tuple(self._pinned_frame.shape) != image.shape:
+            self._pinned_frame = torch.empty(image.shape, dtype=torch.uint8, pin_memory=True)
+            if self._h2d_stream is None:
+                self._h2d_stream = torch.cuda.Stream(device=self.device)
+        else:
+            # The previous async copy must finish before the buffer is reused
+            self._h2d_stream.synchronize()
+        np.copyto(self._pinned_frame.numpy(), image)
+
+        with torch.cuda.stream(self._h2d_stream):
+            gpu_frame = self._pinned_frame.to(self.device, non_blocking=True)
+        compute_stream = torch.cuda.current_stream()
+        compute_stream.wait_stream(self._h2d_stream)
+        gpu_frame.record_stream(compute_stream)
+        return gpu_frame
+
+    def _get_vision_embeds(self, image: np.ndarray, frame_id=None):
+        """Compute vision embeddings, reusing them for recently seen frames.
+
+        Callers query the same frame several times (distractor, safe-set and
+        robot concepts), and static scenes repeat frames, so embeddings of the
+        last ``vision_cache_size`` frames are kept on device in an LRU keyed by
+        image content (or by the caller's ``frame_id``).
+
+        Args:
+            image: Input RGB image as passed to segment(); never converted to
+                PIL (the processor takes the ndarray, or the uploaded frame on CUDA)
+            frame_id: Optional caller-provided frame key; skips content hashing
+
+        Returns:
+            Tuple of (vision_embeds, original_sizes)
+        """
+        cache = self._vision_embeds_cache
+        key = None
+        if self.vision_cache_size > 0:
+            if frame_id is not None:
+                key = ("frame_id", frame_id)
+            else:
+                image = np.ascontiguousarray(image)
+                key = (image.shape, hashlib.blake2b(image.data, digest_size=16).digest())
+            hit = cache.get(key)
+            if hit is not None:
+                cache.move_to_end(key)
+                return hit
+
+        if self.device.startswith("cuda"):
+            # Upload the raw uint8 frame (far smaller than the float32
+            # 1008x1008 pixel_values) and let the torchvision-backed image
+            # processor resize and normalize it on the GPU. Bilinear rounding
+            # on GPU can differ from the CPU path by one uint8 level.
+            frame = self._upload_frame(image).permute(2, 0, 1)
+            img_inputs = self.processor.image_processor(
+                images=frame, return_tensors="pt", device=self.device,
+            )
+        else:
+            img_inputs = self.processor(images=image, return_tensors="pt")
+        # Kept as a Python list so post-processing never syncs on it; it is
+        # computed once per new frame and reused on cache hits
+        original_sizes = img_inputs.get("original_sizes")
+        if original_sizes is not None:
+            original_sizes = original_sizes.tolist()
+        pixel_values = img_inputs["pixel_values"].to(
+            self.device, dtype=self.dtype, memory_format=torch.channels_last,
         )
 
-        # Collect per-instance masks
-        combined_mask = np.zeros((h, w), dtype=np.float32)
-        max_score = 0.0
-        instance_masks = []  # List of (mask, score) for each instance
-
-        if results and len(results) > 0:
-            result = results[0]
-            if "masks" in result and len(result["masks"]) > 0:
-                if "scores" not in result:
-                    raise KeyError("SAM3 post_process returned no 'scores' — check transformers version")
-                scores = result["scores"]
-
-                for i in range(len(result["masks"])):
-                    mask_tensor = result["masks"][i]
-                    mask = mask_tensor.cpu().numpy().astype(np.float32)
-                    score = float(scores[i].cpu()) if isinstance(scores[i], torch.Tensor) else float(scores[i])
-                    max_score = max(max_score, score)
-
-                    # Resize if needed
-                    if mask.shape != (h, w):
-                        import cv2
-                        mask = cv2.resize(mask, (w, h), interpolation=cv2.INTER_NEAREST)
-                    combined_mask = np.maximum(combined_mask, mask)
-                    instance_masks.append((mask.copy(), score))
-
-        return combined_mask, max_score, instance_masks
+        with torch.inference_mode():
+            vision_embeds = self.model.get_vision_features(pixel_values=pixel_values)
+            if key is not None and self.compile_model and self.vision_backend == "torch":
+                # mode="reduce-overhead" returns tensors in the CUDA graph
+                # pool that the next encoder replay overwrites; cached
+                # entries must own their storage
+                vision_embeds = _clone_output(vision_embeds)
+
+        if key is not None:
+            cache[key] = (vision_embeds, original_sizes)
+            while len(cache) > self.vision_cache_size:
+                cache.popitem(last=False)
+        return vision_embeds, original_sizes
+
+    def _collect_group(
+        self,
+        concept_list: List[str],
+        per_concept: Dict[str, tuple],
+        threshold: float,
+        h: int,
+        w: int,
+    ):
+        """Combine per-concept results into one group's mask, scores and instances.
+
+        Instances scoring at or below ``threshold`` are dropped, so results
+        computed at a lower shared threshold can serve a stricter group.
+
+        Args:
+            concept_list: Concepts in this group
+            per_concept: concept -> (mask, max_score, instance_masks) from
+                _segment_single_concept
+            threshold: Presence threshold for this group
+            h, w: Image size
+
+        Returns:
+            Tuple of (combined_mask, individual_masks, scores, instance_masks)
+            with the same layout as segment() and last_scores /
+            last_individual_masks; combined_mask is (H, W) uint8 {0, 1}
+        """
+        combined_mask = np.zeros((h, w), dtype=np.uint8)
+        individual_masks = {}
+        scores = {}
+        inst_masks = {}
+
+        for concept in concept_list:
+            mask, score, instance_masks = per_concept[concept]
+            kept = [(m, sc) for m, sc in instance_masks if sc > threshold]
+            if len(kept) != len(instance_masks):
+                instance_masks = kept
+                if kept:
+                    mask = kept[0][0].copy()
+                    for inst_mask, _ in kept[1:]:
+                        np.bitwise_or(mask, inst_mask, out=mask)
+                    score = max(sc for _, sc in kept)
+                else:
+                    mask = np.zeros((h, w), dtype=np.uint8)
+                    score = 0.0
+
+            individual_masks[concept] = {"mask": mask, "score": score}
+            # Store per-instance masks and scores for debug visualization
+            # Use consistent keys between masks and scores
+            if len(instance_masks) == 0:
+                # No detections - store empty with base name
+                scores[concept] = score
+                inst_masks[concept] = np.zeros((h, w), dtype=np.uint8)
+            elif len(instance_masks) == 1:
+                # Single instance - use base name
+                scores[concept] = instance_masks[0][1]
+                inst_masks[concept] = instance_masks[0][0]
+            else:
+                # Multiple instances - use indexed names only (no base name)
+                for i, (inst_mask, inst_score) in enumerate(instance_masks):
+                    inst_masks[f"{concept}_{i}"] = inst_mask
+                    scores[f"{concept}_{i}"] = inst_score
+            np.bitwise_or(combined_mask, mask, out=combined_mask)
+
+        return combined_mask, individual_masks, scores, inst_masks
 
     def segment(
         self,
@@ -194,6 +764,8 @@ class SAM3Segmenter:
         concepts: str,
         return_individual_masks: bool = False,
         presence_threshold: Optional[float] = None,
+        frame_id=None,
+        return_dtype=np.float32,
     ) -> np.ndarray:
         """Segment image based on text concepts.
 
@@ -202,14 +774,19 @@ class SAM3Segmenter:
             concepts: Dot-separated concept string (e.g., "apple. basket. robot arm")
             return_individual_masks: If True, return dict of individual masks per concept
             presence_threshold: Override presence threshold for this call (default: use instance threshold)
+            frame_id: Optional hashable frame key for the vision-embedding cache
+                (default: key by image content)
+            return_dtype: dtype of the combined mask; the mask is built in
+                uint8, so np.uint8 (or bool) skips the float32 conversion
 
         Returns:
             Combined binary mask where 1 = any concept detected, 0 = background
-            Shape (H, W), dtype float32
+            Shape (H, W), dtype ``return_dtype`` (float32 by default)
 
         Note:
             After calling segment(), you can access self.last_scores for per-concept
-            confidence scores (dict mapping concept -> score).
+            confidence scores (dict mapping concept -> score), and
+            self.last_individual_masks for per-instance (H, W) uint8 {0, 1} masks.
         """
         start_time = time.time()
 
@@ -220,53 +797,20 @@ class SAM3Segmenter:
 
         h, w = image.shape[:2]
 
-        # Convert to PIL Image
-        pil_image = Image.fromarray(image)
-
         # Parse concepts into individual queries
         concept_list = self._parse_concepts(concepts)
 
         # Pre-compute vision embeddings for efficiency
-        img_inputs = self.processor(images=pil_image, return_tensors="pt")
-        img_inputs = {k: v.to(self.device) for k, v in img_inputs.items()}
-        original_sizes = img_inputs.get("original_sizes")
-
-        with torch.no_grad():
-            vision_embeds = self.model.get_vision_features(pixel_values=img_inputs["pixel_values"])
-
-        # Query each concept and combine masks
-        combined_mask = np.zeros((h, w), dtype=np.float32)
-        individual_masks = {}
-        self.last_scores = {}  # Store scores for external access
-        self.last_individual_masks = {}  # Store individual masks for debug visualization
-
-        for concept in concept_list:
-            mask, score, instance_masks = self._segment_single_concept(
-                pil_image, concept, vision_embeds, original_sizes, threshold,
-            )
-            # Scores accessible via self.last_scores after call
-
-            individual_masks[concept] = {"mask": mask, "score": score}
-            # Store per-instance masks and scores for debug visualization
-            # Use consistent keys between masks and scores
-            if len(instance_masks) == 0:
-                # No detections - store empty with base name
-                self.last_scores[concept] = score
-                self.last_individual_masks[concept] = np.zeros_like(combined_mask)
-            elif len(instance_masks) == 1:
-                # Single instance - use base name
-                self.last_scores[concept] = instance_masks[0][1]
-                self.last_individual_masks[concept] = instance_masks[0][0]
-            else:
-                # Multiple instances - use indexed names only (no base name)
-                for i, (inst_mask, inst_score) in enumerate(instance_masks):
-                    self.last_individual_masks[f"{concept}_{i}"] = inst_mask
-                    self.last_scores[f"{concept}_{i}"] = inst_score
-            combined_mask = np.maximum(combined_mask, mask)
+        vision_embeds, original_sizes = self._get_vision_embeds(image, frame_id)
 
-        # Binarize
-        combined_mask = (combined_mask > 0.5).astype(np.float32)
-        # Coverage accessible via combined_mask after call
+        per_concept = self._segment_concepts(
+            {concept: threshold for concept in concept_list},
+            vision_embeds, original_sizes, h, w,
+        )
+        combined_mask, individual_masks, self.last_scores, self.last_individual_masks = (
+            self._collect_group(concept_list, per_concept, threshold, h, w)
+        )
+        combined_mask = combined_mask.astype(return_dtype, copy=False)
 
         self.last_segment_time = time.time() - start_time
 
@@ -275,6 +819,69 @@ class SAM3Segmenter:
 
         return combined_mask
 
+    def segment_many(
+        self,
+        image: np.ndarray,
+        concept_groups: List[str],
+        presence_thresholds: Optional[List[Optional[float]]] = None,
+        frame_id=None,
+        return_dtype=np.float32,
+    ) -> List[Tuple[np.ndarray, Dict[str, float], Dict[str, np.ndarray]]]:
+        """Segment several concept groups on the same image with shared work.
+
+        The vision encoder runs once, and a concept that appears in more than
+        one group is queried once at the lowest of those groups' thresholds.
+
+        Args:
+            image: Input RGB image, shape (H, W, 3), dtype uint8
+            concept_groups: Dot-separated concept strings, one per group
+            presence_thresholds: Per-group threshold overrides (default: instance threshold)
+            frame_id: Optional hashable frame key for the vision-embedding cache
+            return_dtype: dtype of each group's mask (see segment())
+
+        Returns:
+            List with one (mask, scores, individual_masks) tuple per group,
+            where scores / individual_masks match last_scores /
+            last_individual_masks of an equivalent segment() call.
+            last_scores / last_individual_masks are set to the last group's.
+        """
+        start_time = time.time()
+
+        self._lazy_init()
+
+        if presence_thresholds is None:
+            presence_thresholds = [None] * len(concept_groups)
+        thresholds = [
+            t if t is not None else self.presence_threshold for t in presence_thresholds
+        ]
+
+        h, w = image.shape[:2]
+        group_lists = [self._parse_concepts(g) for g in concept_groups]
+
+        # Lowest threshold per concept across the groups that ask for it
+        concept_thresholds: Dict[str, float] = {}
+        for concept_list, threshold in zip(group_lists, thresholds):
+            for concept in concept_list:
+                concept_thresholds[concept] = min(
+                    threshold, concept_thresholds.get(concept, threshold)
+                )
+
+        vision_embeds, original_sizes = self._get_vision_embeds(image, frame_id)
+        per_concept = self._segment_concepts(
+            concept_thresholds, vision_embeds, original_sizes, h, w,
+        )
+
+        results = []
+        for concept_list, threshold in zip(group_lists, thresholds):
+            mask, _, scores, inst_masks = self._collect_group(
+                concept_list, per_concept, threshold, h, w,
+            )
+            results.append((mask.astype(return_dtype, copy=False), scores, inst_masks))
+            self.last_scores, self.last_individual_masks = scores, inst_masks
+
+        self.last_segment_time = time.time() - start_time
+        return results
+
 
 
 class MockSAM3Segmenter:
@@ -289,6 +896,7 @@ class MockSAM3Segmenter:
         self.last_scores = {}  # Mock scores
         self.last_individual_masks = {}  # Mock individual masks
         self.last_segment_time: float = 0.0  # Timing instrumentation
+        self._mask_cache: Dict[Tuple[int, int], np.ndarray] = {}  # (h, w) -> mask
 
     def segment(
         self,
@@ -296,6 +904,7 @@ class MockSAM3Segmenter:
         concepts: str,
         return_individual_masks: bool = False,
         presence_threshold: Optional[float] = None,
+        frame_id=None,
     ) -> np.ndarray:
         """Return a mock center-weighted mask.
 
@@ -304,22 +913,29 @@ class MockSAM3Segmenter:
             concepts: Dot-separated concept string
             return_individual_masks: If True, return dict of individual masks
             presence_threshold: Override presence threshold (ignored in mock)
+            frame_id: Frame cache key (ignored in mock)
         """
         start_time = time.time()
 
         h, w = image.shape[:2]
 
-        # Create center-weighted Gaussian mask
-        y, x = np.ogrid[:h, :w]
-        cy, cx = h // 2, w // 2
-        # Larger sigma = more of the image is "foreground"
-        sigma = min(h, w) // 3
-
-        mask = np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2 * sigma**2))
-        mask = (mask > 0.3).astype(np.float32)
+        # The mask depends only on the frame size; build it once per size and
+        # hand out copies (callers may accumulate into the returned mask)
+        cached = self._mask_cache.get((h, w))
+        if cached is None:
+            # Create center-weighted Gaussian mask
+            y, x = np.ogrid[:h, :w]
+            cy, cx = h // 2, w // 2
+            # Larger sigma = more of the image is "foreground"
+            sigma = min(h, w) // 3
+
+            cached = np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2 * sigma**2))
+            cached = (cached > 0.3).astype(np.float32)
+            self._mask_cache[(h, w)] = cached
+        mask = cached.copy()
 
         # Mock scores for each concept
-        concept_list = [c.strip() for c in concepts.split(".") if c.strip()]
+        concept_list = list(_split_concepts(concepts))
         self.last_scores = {c: 0.85 for c in concept_list}  # Mock high confidence
 
         self.last_segment_time = time.time() - start_time
@@ -328,6 +944,22 @@ class MockSAM3Segmenter:
             return mask, {}
         return mask
 
+    def segment_many(
+        self,
+        image: np.ndarray,
+        concept_groups: List[str],
+        presence_thresholds: Optional[List[Optional[float]]] = None,
+        frame_id=None,
+    ) -> List[Tuple[np.ndarray, Dict[str, float], Dict[str, np.ndarray]]]:
+        """Mock counterpart of SAM3Segmenter.segment_many (one segment() per group)."""
+        if presence_thresholds is None:
+            presence_thresholds = [None] * len(concept_groups)
+        results = []
+        for concepts, threshold in zip(concept_groups, presence_thresholds):
+            mask = self.segment(image, concepts, presence_threshold=threshold)
+            results.append((mask, self.last_scores, self.last_individual_masks))
+        return results
+
 
 
 class SAM3ClientSegmenter:
@@ -338,6 +970,9 @@ class SAM3ClientSegmenter:
 
     Start the server first:
         python scripts/sam3_server.py
+
+    Pixels and masks are exchanged through shared memory segments owned by
+    the client; only the small request/response metadata goes through files.
     """
 
     def __init__(
@@ -353,7 +988,12 @@ class SAM3ClientSegmenter:
         self.last_scores = {}
         self.last_individual_masks = {}
         self.last_segment_time: float = 0.0  # Timing instrumentation
+        self._shm = {}  # "image"/"mask" -> SharedMemory, grown on demand
+        self._fifo_r: Optional[int] = None
+        self._fifo_w: Optional[int] = None
         self._check_server()
+        self._open_fifo()
+        atexit.register(self.close)
 
     def _check_server(self):
         """Check if SAM3 server is running."""
@@ -368,8 +1008,63 @@ class SAM3ClientSegmenter:
 
     def _parse_concepts(self, concepts: str) -> List[str]:
         """Parse dot-separated concept string into list."""
-        parts = concepts.split(".")
-        return [p.strip() for p in parts if p.strip()]
+        return list(_split_concepts(concepts))
+
+    def _shm_array(self, key: str, shape: Tuple[int, ...], dtype) -> Tuple[str, np.ndarray]:
+        """Return (segment name, ndarray view) for a reusable shared memory block.
+
+        The segment is only reallocated when it is too small for ``shape``.
+        """
+        from multiprocessing import shared_memory
+
+        nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        shm = self._shm.get(key)
+        if shm is None or shm.size < nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._shm[key] = shm
+        return shm.name, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def _open_fifo(self):
+        """Open the FIFO the server writes one byte to after each response.
+
+        A write end is held open too, so the read end never reports EOF
+        between responses and select() only wakes on a real notification.
+        """
+        fifo_path = self.comm_dir / "response.fifo"
+        if not fifo_path.exists():
+            os.mkfifo(fifo_path)
+        self._fifo_r = os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+        self._fifo_w = os.open(fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+
+    def _drain_fifo(self):
+        """Discard pending notifications (e.g. from a response already read)."""
+        try:
+            while os.read(self._fifo_r, 64):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        """Release the shared memory segments and FIFO used to talk to the server."""
+        for shm in self._shm.values():
+            try:
+                shm.close()
+            except BufferError:
+                # A view into the block is still alive; the mapping goes away
+                # with the process, but the segment itself is unlinked below
+                print(f"[SAM3 Client] WARNING: shared memory {shm.name} still in use at close")
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = {}
+        for fd in (self._fifo_r, self._fifo_w):
+            if fd is not None:
+                os.close(fd)
+        self._fifo_r = self._fifo_w = None
 
     def segment(
         self,
@@ -377,10 +1072,10 @@ class SAM3ClientSegmenter:
         concepts: str,
         presence_threshold: Optional[float] = None,
         verbose: bool = False,
+        frame_id=None,
     ) -> np.ndarray:
-        """Segment image by sending request to SAM3 server."""
+        """Segment image by sending request to SAM3 server (frame_id is ignored)."""
         import json
-        import tempfile
 
         start_time = time.time()
 
@@ -390,89 +1085,110 @@ class SAM3ClientSegmenter:
         if verbose:
             print(f"[SAM3 Client] Requesting segmentation: {concept_list}")
 
-        # Save image to temp file
-        pil_image = Image.fromarray(image) if isinstance(image, np.ndarray) else image
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
-            image_path = f.name
-            pil_image.save(image_path)
-
-        try:
-            # Write request
-            request_file = self.comm_dir / "request.json"
-            response_file = self.comm_dir / "response.npz"
-
-            # Remove old response
-            if response_file.exists():
-                response_file.unlink()
-
-            # Send request (atomic write via temp file + rename to avoid race)
-            request = {
-                'image_path': image_path,
-                'concepts': concept_list,
-                'threshold': threshold,
-            }
-            tmp_request = request_file.with_suffix('.json.tmp')
-            with open(tmp_request, 'w') as f:
-                json.dump(request, f)
-            tmp_request.rename(request_file)
-
-            # Wait for response
-            wait_start = time.time()
-            while not response_file.exists():
-                if time.time() - wait_start > self.timeout:
-                    raise TimeoutError(f"SAM3 server timeout after {self.timeout}s")
-                time.sleep(0.01)
-
-            # Wait a bit for file to be fully written, then load with retries
-            time.sleep(0.1)
-            max_retries = 5
-            for attempt in range(max_retries):
-                try:
-                    data = np.load(response_file)
-                    break
-                except EOFError:
-                    if attempt < max_retries - 1:
-                        time.sleep(0.1)
-                    else:
-                        raise
-
-            if 'error' in data.files:
-                raise RuntimeError(f"SAM3 server error: {data['error']}")
+        # Hand pixels to the server through shared memory (no PNG roundtrip);
+        # the server writes [combined, *per-concept] masks into a second block
+        image = np.asarray(image, dtype=np.uint8)
+        h, w = image.shape[:2]
+        image_shm, image_view = self._shm_array("image", image.shape, np.uint8)
+        image_view[...] = image
+        mask_shm, mask_view = self._shm_array("mask", (len(concept_list) + 1, h, w), np.bool_)
+
+        # Write request
+        request_file = self.comm_dir / "request.json"
+        response_file = self.comm_dir / "response.npz"
+
+        # Remove old response and any stale wakeup
+        if response_file.exists():
+            response_file.unlink()
+        self._drain_fifo()
+
+        # Send request (atomic write via temp file + rename to avoid race)
+        request = {
+            'image_shm': image_shm,
+            'image_shape': list(image.shape),
+            'mask_shm': mask_shm,
+            'concepts': concept_list,
+            'threshold': threshold,
+        }
+        tmp_request = request_file.with_suffix('.json.tmp')
+        with open(tmp_request, 'w') as f:
+            json.dump(request, f)
+        tmp_request.rename(request_file)
+
+        # Wait for response: block on the FIFO wakeup. The server renames
+        # the response into place before notifying, so it is complete once
+        # it exists. The bounded select only matters for older servers that
+        # never write to the FIFO.
+        deadline = time.time() + self.timeout
+        while not response_file.exists():
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError(f"SAM3 server timeout after {self.timeout}s")
+            select.select([self._fifo_r], [], [], min(remaining, 0.5))
+            self._drain_fifo()
+
+        data = np.load(response_file)
+
+        if 'error' in data.files:
+            raise RuntimeError(f"SAM3 server error: {data['error']}")
 
+        self.last_scores = {}
+        self.last_individual_masks = {}
+        if 'scores' in data.files:
+            # Masks were written into shared memory; copy them out before the
+            # next request reuses the block
+            scores = data['scores']
+            mask = mask_view[0].copy()
+            for i, concept in enumerate(concept_list):
+                self.last_scores[concept] = float(scores[i])
+                self.last_individual_masks[concept] = mask_view[i + 1].view(np.uint8).copy()
+        else:
+            # Fallback for old server that sends masks inside the npz
             if 'mask' not in data.files:
                 raise RuntimeError(f"SAM3 server response missing 'mask' key. Keys: {list(data.files)}")
             mask = data['mask']
-
-            # Parse per-concept masks and scores from server response
-            concept_list = self._parse_concepts(concepts)
-            self.last_scores = {}
-            self.last_individual_masks = {}
             for concept in concept_list:
                 score_key = f'score_{concept}'
                 mask_key = f'mask_{concept}'
                 if score_key in data.files and mask_key in data.files:
                     self.last_scores[concept] = float(data[score_key])
-                    self.last_individual_masks[concept] = data[mask_key].astype(np.float32)
+                    self.last_individual_masks[concept] = data[mask_key].astype(np.uint8)
                 else:
                     # Fallback for old server that doesn't send per-concept data
                     self.last_scores[concept] = 1.0 if mask.any() else 0.0
-                    self.last_individual_masks[concept] = mask.astype(np.float32)
+                    self.last_individual_masks[concept] = (mask > 0.5).astype(np.uint8)
 
-            if verbose:
-                print(f"[SAM3 Client] Mask coverage: {mask.sum() / mask.size * 100:.1f}%")
-                for concept in concept_list:
-                    score = self.last_scores.get(concept, 0.0)
-                    cmask = self.last_individual_masks.get(concept)
-                    cov = cmask.sum() / cmask.size * 100 if cmask is not None else 0.0
-                    print(f"[SAM3 Client] Concept '{concept}': score={score:.3f}, coverage={cov:.1f}%")
+        if verbose:
+            print(f"[SAM3 Client] Mask coverage: {mask.sum() / mask.size * 100:.1f}%")
+            for concept in concept_list:
+                score = self.last_scores.get(concept, 0.0)
+                cmask = self.last_individual_masks.get(concept)
+                cov = cmask.sum() / cmask.size * 100 if cmask is not None else 0.0
+                print(f"[SAM3 Client] Concept '{concept}': score={score:.3f}, coverage={cov:.1f}%")
 
-            self.last_segment_time = time.time() - start_time
+        self.last_segment_time = time.time() - start_time
 
-            return mask
+        return mask
 
-        finally:
-            # Cleanup temp file
-            os.unlink(image_path)
+    def segment_many(
+        self,
+        image: np.ndarray,
+        concept_groups: List[str],
+        presence_thresholds: Optional[List[Optional[float]]] = None,
+        frame_id=None,
+    ) -> List[Tuple[np.ndarray, Dict[str, float], Dict[str, np.ndarray]]]:
+        """Segment several concept groups, one server request per group.
+
+        Matches SAM3Segmenter.segment_many so callers need not special-case
+        the client.
+        """
+        if presence_thresholds is None:
+            presence_thresholds = [None] * len(concept_groups)
+        results = []
+        for concepts, threshold in zip(concept_groups, presence_thresholds):
+            mask = self.segment(image, concepts, presence_threshold=threshold)
+            results.append((mask, self.last_scores, self.last_individual_masks))
+        return results
 
 
 
@@ -480,6 +1196,7 @@ class SAM3ClientSegmenter:
 _sam3_singleton: Optional[SAM3Segmenter] = None
 _sam3_client_singleton: Optional[SAM3ClientSegmenter] = None
 _mock_singleton: Optional[MockSAM3Segmenter] = None
+_singleton_lock = threading.Lock()
 
 
 def get_sam3_segmenter(
@@ -507,29 +1224,38 @@ def get_sam3_segmenter(
     """
     global _sam3_singleton, _sam3_client_singleton, _mock_singleton
 
+    # Double-checked locking: concurrent first calls must not each build
+    # (and move to GPU) their own model
     if use_mock:
         if _mock_singleton is None:
-            _mock_singleton = MockSAM3Segmenter(**kwargs)
-            print("[SAM3] Created singleton MockSAM3Segmenter")
+            with _singleton_lock:
+                if _mock_singleton is None:
+                    _mock_singleton = MockSAM3Segmenter(**kwargs)
+                    print("[SAM3] Created singleton MockSAM3Segmenter")
         return _mock_singleton
 
     if use_server:
         if _sam3_client_singleton is None:
-            _sam3_client_singleton = SAM3ClientSegmenter(**kwargs)
-            print("[SAM3] Created singleton SAM3ClientSegmenter")
+            with _singleton_lock:
+                if _sam3_client_singleton is None:
+                    _sam3_client_singleton = SAM3ClientSegmenter(**kwargs)
+                    print("[SAM3] Created singleton SAM3ClientSegmenter")
         return _sam3_client_singleton
 
     if _sam3_singleton is None:
-        _sam3_singleton = SAM3Segmenter(**kwargs)
-        print("[SAM3] Created singleton SAM3Segmenter")
+        with _singleton_lock:
+            if _sam3_singleton is None:
+                _sam3_singleton = SAM3Segmenter(**kwargs)
+                print("[SAM3] Created singleton SAM3Segmenter")
     return _sam3_singleton
 
 
 def clear_sam3_singleton():
     """Clear the singleton instances (useful for testing or memory cleanup)."""
     global _sam3_singleton, _sam3_client_singleton, _mock_singleton
-    _sam3_singleton = None
-    _sam3_client_singleton = None
-    _mock_singleton = None
+    with _singleton_lock:
+        _sam3_singleton = None
+        _sam3_client_singleton = None
+        _mock_singleton = None
 
 
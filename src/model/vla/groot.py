@@ -13,7 +13,8 @@ Usage:
     actions = model.forward(images, state, instruction)
 """
 
-from typing import Optional
+from types import MappingProxyType
+from typing import ClassVar, Mapping, Optional
 
 import numpy as np
 import torch
@@ -35,6 +36,40 @@ class GR00TInference:
         "fractal": 8,  # xyz + quat + gripper
     }
 
+    # Index into the state vector for each GR00T state key (None: zero padding)
+    STATE_KEY_INDICES: ClassVar[Mapping[str, Mapping[str, Optional[int]]]] = (
+        MappingProxyType(
+            {
+                # xyz(3) + rpy(3) + gripper(1) = 7 values, 8 keys
+                "bridge": MappingProxyType(
+                    {
+                        "x": 0,
+                        "y": 1,
+                        "z": 2,
+                        "roll": 3,
+                        "pitch": 4,
+                        "yaw": 5,
+                        "pad": None,
+                        "gripper": 6,
+                    }
+                ),
+                # xyz(3) + quat_xyzw(4) + gripper(1) = 8 values, 8 keys
+                "fractal": MappingProxyType(
+                    {
+                        "x": 0,
+                        "y": 1,
+                        "z": 2,
+                        "rx": 3,
+                        "ry": 4,
+                        "rz": 5,
+                        "rw": 6,
+                        "gripper": 7,
+                    }
+                ),
+            }
+        )
+    )
+
     # Action dimensions for each embodiment
     ACTION_DIMS = {
         "bridge": 7,  # xyz + euler + gripper
@@ -105,6 +140,13 @@ class GR00TInference:
         # Get modality config to understand expected keys
         self.modality_config = self.policy.modality_configs
 
+        # Keys are fixed for the life of the policy; resolve them once
+        # instead of on every forward()
+        self._video_key = self.modality_config["video"].modality_keys[0]
+        self._state_keys = tuple(self.modality_config["state"].modality_keys)
+        self._language_key = self.policy.language_key
+        self._action_keys = tuple(self.modality_config["action"].modality_keys)
+
         print(f"[GR00T] Model loaded successfully on {self.device}")
         print(f"[GR00T] Video keys: {self.modality_config['video'].modality_keys}")
         print(f"[GR00T] State keys: {self.modality_config['state'].modality_keys}")
@@ -129,11 +171,6 @@ class GR00TInference:
         Returns:
             actions: Predicted action chunk [horizon, action_dim] unnormalized
         """
-        # Get expected keys from modality config
-        video_key = self.modality_config["video"].modality_keys[0]
-        state_keys = self.modality_config["state"].modality_keys
-        language_key = self.policy.language_key
-
         # Prepare observation dict for GR00T
         # Expected format:
         #   video: dict[str, np.ndarray[np.uint8, (B, T, H, W, C)]]
@@ -141,20 +178,20 @@ class GR00TInference:
         #   language: dict[str, list[list[str]]] (shape B, T)
 
         # Add batch and temporal dimensions
-        # images: [H, W, 3] -> [1, 1, H, W, 3]
-        video_data = images[np.newaxis, np.newaxis, ...].astype(np.uint8)
+        # images: [H, W, 3] -> [1, 1, H, W, 3] (a view when already uint8)
+        video_data = np.asarray(images, dtype=np.uint8)[np.newaxis, np.newaxis, ...]
 
         # Split state into separate keys as expected by GR00T
         # Each state key should be [B, T, 1] for scalar values
-        state_dict = self._split_state_to_keys(state, state_keys)
+        state_dict = self._split_state_to_keys(state, self._state_keys)
 
         # language: str -> [[str]]
         language_data = [[instruction]]
 
         obs = {
-            "video": {video_key: video_data},
+            "video": {self._video_key: video_data},
             "state": state_dict,
-            "language": {language_key: language_data},
+            "language": {self._language_key: language_data},
         }
 
         # Run inference
@@ -170,7 +207,7 @@ class GR00TInference:
     def _split_state_to_keys(
         self,
         state: np.ndarray,
-        state_keys: list,
+        state_keys: tuple,
     ) -> dict:
         """
         Split state array into dict with separate keys for GR00T.
@@ -180,50 +217,28 @@ class GR00TInference:
 
         Args:
             state: [state_dim] float32 array
-            state_keys: list of state key names from modality config
+            state_keys: state key names from modality config
 
         Returns:
             dict mapping state keys to [1, 1, 1] arrays
         """
-        state_dict = {}
-
         # For Bridge/WidowX: state has 7 elements but 8 keys (pad is added)
         # For Fractal/Google: state has 8 elements and 8 keys
-        if self.embodiment == "bridge":
-            # State: xyz(3) + rpy(3) + gripper(1) = 7
-            # Keys: x, y, z, roll, pitch, yaw, pad, gripper = 8
-            mapping = {
-                "x": state[0:1],
-                "y": state[1:2],
-                "z": state[2:3],
-                "roll": state[3:4],
-                "pitch": state[4:5],
-                "yaw": state[5:6],
-                "pad": np.array([0.0], dtype=np.float32),  # Dummy padding
-                "gripper": state[6:7],
-            }
-        else:  # fractal
-            # State: xyz(3) + quat_xyzw(4) + gripper(1) = 8
-            # Keys: x, y, z, rx, ry, rz, rw, gripper = 8
-            mapping = {
-                "x": state[0:1],
-                "y": state[1:2],
-                "z": state[2:3],
-                "rx": state[3:4],
-                "ry": state[4:5],
-                "rz": state[5:6],
-                "rw": state[6:7],
-                "gripper": state[7:8],
-            }
-
-        # Build state dict with proper shape [B, T, D] = [1, 1, 1]
-        for key in state_keys:
-            if key in mapping:
-                state_dict[key] = mapping[key][np.newaxis, np.newaxis, :].astype(np.float32)
-            else:
+        index_map = self.STATE_KEY_INDICES[self.embodiment]
+        dst = []
+        src = []
+        for i, key in enumerate(state_keys):
+            if key not in index_map:
                 raise KeyError(f"Unknown state key: {key}")
+            if index_map[key] is not None:
+                dst.append(i)
+                src.append(index_map[key])
 
-        return state_dict
+        # Fill one [K, 1, 1, 1] buffer with a single gather; each key gets a
+        # [B, T, D] = [1, 1, 1] view into it (pad stays zero)
+        buf = np.zeros((len(state_keys), 1, 1, 1), dtype=np.float32)
+        buf[dst, 0, 0, 0] = np.asarray(state, dtype=np.float32)[src]
+        return {key: buf[i] for i, key in enumerate(state_keys)}
 
     def _concat_action_keys(self, action_chunk: dict) -> np.ndarray:
         """
@@ -237,11 +252,9 @@ class GR00TInference:
         Returns:
             actions: [T, 7] numpy array
         """
-        action_keys = self.modality_config["action"].modality_keys
         # Expected order: x, y, z, roll, pitch, yaw, gripper
-
         action_arrays = []
-        for key in action_keys:
+        for key in self._action_keys:
             arr = action_chunk[key]
             # Remove batch dimension: [B, T, 1] -> [T, 1]
             if arr.ndim == 3:
@@ -130,7 +130,8 @@ class OpenPIInference:
         Returns:
             actions: Predicted action chunk [horizon, action_dim]
         """
-        # Ensure image is uint8 and HWC format
+        # Ensure image is uint8 and HWC format (the common uint8 case skips
+        # the range check and the cast entirely)
         if image.dtype != np.uint8:
             if image.max() <= 1.0:
                 image = (image * 255).astype(np.uint8)
@@ -146,7 +147,7 @@ class OpenPIInference:
         # The WidowXInputs transform will handle padding for missing cameras
         obs = {
             "observation/image": image,
-            "observation/state": state.astype(np.float32),
+            "observation/state": np.asarray(state, dtype=np.float32),
             "prompt": instruction,
         }
 
@@ -16,6 +16,8 @@ Usage:
     action = model.forward(image, instruction)
 """
 
+from typing import Optional
+
 import numpy as np
 
 
@@ -29,6 +31,8 @@ class OpenVLAInference:
         device: str = "cuda:0",
         use_bf16: bool = True,
         load_in_8bit: bool = False,
+        load_in_4bit: bool = False,
+        attn_implementation: Optional[str] = None,
     ):
         """
         Initialize the OpenVLA model wrapper.
@@ -39,12 +43,32 @@ class OpenVLAInference:
             device: Device to run on (e.g., "cuda:0")
             use_bf16: Use bfloat16 precision
             load_in_8bit: Load model in 8-bit quantization (reduces VRAM)
+            load_in_4bit: Load model in 4-bit NF4 quantization with double
+                quantization and bf16 compute (about half the VRAM of 8-bit)
+            attn_implementation: Opt-in attention kernel for the LLM backbone:
+                "flash_attention_2", "sdpa", "eager", or "auto" (flash
+                attention 2 when flash_attn is installed, running on CUDA and
+                the weights load in bf16, else "sdpa"). Flash attention 2
+                rejects fp32 modules, so it needs use_bf16 without 8-bit.
+                Default None keeps the model's own choice
         """
+        if load_in_8bit and load_in_4bit:
+            raise ValueError("load_in_8bit and load_in_4bit are mutually exclusive")
+        if attn_implementation not in (None, "auto", "flash_attention_2", "sdpa", "eager"):
+            raise ValueError(f"Unknown attn_implementation: {attn_implementation!r}")
+        # A bf16 torch_dtype is only set with use_bf16 and without 8-bit
+        if attn_implementation == "flash_attention_2" and (not use_bf16 or load_in_8bit):
+            raise ValueError(
+                "attn_implementation='flash_attention_2' needs bf16 weights "
+                "(use_bf16=True, without load_in_8bit)"
+            )
         self.model_path = model_path
         self.unnorm_key = unnorm_key
         self.device = device
         self.use_bf16 = use_bf16
         self.load_in_8bit = load_in_8bit
+        self.load_in_4bit = load_in_4bit
+        self.attn_implementation = attn_implementation
 
         self._load_model()
 
@@ -66,7 +90,8 @@ class OpenVLAInference:
             )
 
         print(f"[OpenVLA] Loading model from {self.model_path}")
-        print(f"[OpenVLA] Device: {self.device}, bf16: {self.use_bf16}, 8bit: {self.load_in_8bit}")
+        print(f"[OpenVLA] Device: {self.device}, bf16: {self.use_bf16}, "
+              f"8bit: {self.load_in_8bit}, 4bit: {self.load_in_4bit}")
 
         # Register OpenVLA's custom Auto classes if available
         if get_vla_model_and_tokenizer is not None:
@@ -85,9 +110,41 @@ class OpenVLAInference:
             "low_cpu_mem_usage": True,
         }
 
+        # Fused attention kernels (opt-in): flash attention 2 needs the
+        # flash_attn package and a bf16 torch_dtype, SDPA works everywhere
+        attn_implementation = self.attn_implementation
+        if attn_implementation == "auto":
+            import importlib.util
+
+            use_flash = (
+                importlib.util.find_spec("flash_attn") is not None
+                and torch.cuda.is_available()
+                and self.device.startswith("cuda")
+                and self.use_bf16
+                and not self.load_in_8bit
+            )
+            attn_implementation = "flash_attention_2" if use_flash else "sdpa"
+        if attn_implementation is not None:
+            model_kwargs["attn_implementation"] = attn_implementation
+            print(f"[OpenVLA] Attention implementation: {attn_implementation}")
+
         if self.load_in_8bit:
             model_kwargs["load_in_8bit"] = True
             model_kwargs["device_map"] = "auto"
+        elif self.load_in_4bit:
+            from transformers import BitsAndBytesConfig
+
+            model_kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_use_double_quant=True,
+                bnb_4bit_compute_dtype=torch.bfloat16,
+            )
+            model_kwargs["device_map"] = "auto"
+            if self.use_bf16:
+                # Non-quantized modules (norms, embeddings) and the inputs
+                # cast to model.dtype in forward()
+                model_kwargs["torch_dtype"] = torch.bfloat16
         else:
             if self.use_bf16:
                 model_kwargs["torch_dtype"] = torch.bfloat16
@@ -97,7 +154,8 @@ class OpenVLAInference:
             **model_kwargs,
         )
 
-        if not self.load_in_8bit:
+        # bitsandbytes places quantized weights itself via device_map
+        if not (self.load_in_8bit or self.load_in_4bit):
             self.model = self.model.to(self.device)
 
         print(f"[OpenVLA] Model loaded successfully")
@@ -17,6 +17,7 @@ Usage:
 """
 
 from collections import deque
+from itertools import islice
 
 import numpy as np
 
@@ -29,10 +30,22 @@ class SpatialVLAInference:
         model_path: str = "IPEC-COMMUNITY/spatialvla-4b-224-sft-bridge",
         unnorm_key: str = "bridge_orig/1.0.0",
         device: str = "cuda:0",
+        compile_model: bool = False,
     ):
+        """
+        Initialize the SpatialVLA model wrapper.
+
+        Args:
+            model_path: HuggingFace model path or local path
+            unnorm_key: Unnormalization key for action decoding (dataset-specific)
+            device: Device to run on (e.g., "cuda:0")
+            compile_model: torch.compile the SigLIP vision tower with CUDA graphs
+                (mode="reduce-overhead"); compiled and warmed up at load
+        """
         self.model_path = model_path
         self.unnorm_key = unnorm_key
         self.device = device
+        self.compile_model = compile_model
 
         self._load_model()
 
@@ -62,6 +75,20 @@ class SpatialVLAInference:
         self.image_history = deque(maxlen=maxlen)
 
         print(f"[SpatialVLA] obs_interval={self.obs_interval}, num_obs_steps={num_obs_steps}, history_len={maxlen}")
+
+        if self.compile_model:
+            # Only the vision tower: its 224x224 input is fixed (one shape per
+            # image count), while predict_action's autoregressive decode grows
+            # the KV cache every token and would recompile per length
+            print("[SpatialVLA] Compiling vision tower with torch.compile")
+            self.model.vision_tower.compile(mode="reduce-overhead", dynamic=False)
+
+            # Warm up every image count the history can produce so compilation
+            # happens here, not in the first episode
+            dummy = np.zeros((224, 224, 3), dtype=np.uint8)
+            for _ in range(maxlen):
+                self.forward(dummy, "warm up")
+            self.reset()
         print(f"[SpatialVLA] Model loaded successfully")
         if torch.cuda.is_available():
             device_idx = int(self.device.split(":")[-1]) if ":" in self.device else 0
@@ -84,13 +111,15 @@ class SpatialVLAInference:
             actions: [T, 7] numpy array of action chunks
                      (xyz + euler + gripper), already unnormalized.
         """
+        import torch
         from PIL import Image
 
         pil_image = Image.fromarray(image)
         self.image_history.append(pil_image)
 
-        # Sample images at obs_interval spacing from history
-        images = list(self.image_history)[::self.obs_interval]
+        # Sample images at obs_interval spacing from history (one pass over
+        # the deque, no intermediate copy of the whole history)
+        images = list(islice(self.image_history, 0, None, self.obs_interval))
 
         inputs = self.processor(
             images=images,
@@ -100,14 +129,20 @@ class SpatialVLAInference:
             do_normalize=False,
         ).to(self.model.device)
 
-        generation_outputs = self.model.predict_action(inputs)
-        decoded = self.processor.decode_actions(
-            generation_outputs,
-            unnorm_key=self.unnorm_key,
-        )
+        # Results go straight to numpy, so skip autograd bookkeeping entirely
+        with torch.inference_mode():
+            generation_outputs = self.model.predict_action(inputs)
+            decoded = self.processor.decode_actions(
+                generation_outputs,
+                unnorm_key=self.unnorm_key,
+            )
         actions = decoded["actions"]  # [T, 7] numpy array
 
-        return np.asarray(actions, dtype=np.float32)
+        if isinstance(actions, torch.Tensor):
+            # .cpu() is the single, explicit device -> host copy
+            return actions.detach().to(torch.float32).cpu().numpy()
+        # No copy when decode already produced float32
+        return np.asarray(actions).astype(np.float32, copy=False)
 
     def reset(self):
         """Reset policy state between episodes. Clears image history."""
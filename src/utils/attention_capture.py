@@ -1,23 +1,62 @@
 """Attention capture utility for Pi0 visualization."""
 
 import math
-from typing import Dict, List, Optional
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set, Tuple
 
 import numpy as np
 import torch
 import torch.nn as nn
 
 
-class AttentionCapture:
-    """Lightweight attention capture for batch evaluation."""
+def _jet_lut() -> np.ndarray:
+    """256-entry RGB uint8 lookup table for matplotlib's 'jet' colormap."""
+    # Piecewise-linear (position, value) anchors from matplotlib's jet data
+    anchors = (
+        ((0.0, 0.0), (0.35, 0.0), (0.66, 1.0), (0.89, 1.0), (1.0, 0.5)),
+        ((0.0, 0.0), (0.125, 0.0), (0.375, 1.0), (0.64, 1.0), (0.91, 0.0), (1.0, 0.0)),
+        ((0.0, 0.5), (0.11, 1.0), (0.34, 1.0), (0.65, 0.0), (1.0, 0.0)),
+    )
+    x = np.linspace(0.0, 1.0, 256)
+    channels = [np.interp(x, *zip(*points)) for points in anchors]
+    return np.round(np.stack(channels, axis=-1) * 255).astype(np.uint8)
+
+
+_JET_LUT = _jet_lut()
 
-    def __init__(self, model: nn.Module, num_image_tokens: int = 256):
+
+class AttentionCapture:
+    """Lightweight attention capture for batch evaluation.
+
+    Hooks stay registered but only record inside ``with capture.capture():``,
+    so forwards that don't need a heatmap pay nothing beyond the hook call.
+
+    Args:
+        model: Pi0 model with a ``joint_model`` holding a 'vlm' mixture
+        num_image_tokens: Number of leading image tokens in the sequence
+        capture_layers: VLM layer indices to hook (negative indices count
+            from the end); None hooks every layer. With ``{-1}`` only the
+            last layer is scored, which is all ``aggregate='last'`` reads.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        num_image_tokens: int = 256,
+        capture_layers: Optional[Set[int]] = None,
+    ):
         self.model = model
         self.num_image_tokens = num_image_tokens
-        self.attention_weights: List[Dict] = []
+        self.capture_layers = capture_layers
+        self.enabled = False
+        # Running per-layer aggregates of the head-averaged last-token
+        # attention to image tokens, [B, num_image_tokens] on the model device
+        self._attn_sum: Optional[torch.Tensor] = None
+        self._attn_last: Optional[torch.Tensor] = None
+        self._num_layers_captured = 0
         self.hooks: List[torch.utils.hooks.RemovableHandle] = []
-        self._q_cache: Dict[str, torch.Tensor] = {}
-        self._k_cache: Dict[str, torch.Tensor] = {}
+        # Per-layer (num_heads, num_kv_heads, head_dim), read once at hook time
+        self._attn_meta: Dict[str, Tuple[int, int, int]] = {}
         self._register_hooks()
 
     def _register_hooks(self):
@@ -32,99 +71,111 @@ class AttentionCapture:
             return
 
         vlm = mixtures['vlm']
-        # Store Q and K outputs per layer for later combination
-        self._q_cache = {}
-        self._k_cache = {}
+        num_layers = len(vlm.layers)
+        layer_indices = None
+        if self.capture_layers is not None:
+            layer_indices = {idx % num_layers for idx in self.capture_layers}
 
         for layer_idx, layer in enumerate(vlm.layers):
+            if layer_indices is not None and layer_idx not in layer_indices:
+                continue
             if hasattr(layer, 'self_attn'):
                 attn = layer.self_attn
-                # Hook q_proj and k_proj Linear layers directly
-                if hasattr(attn, 'q_proj'):
-                    hook_q = attn.q_proj.register_forward_hook(
-                        self._create_proj_hook(f"vlm.layer{layer_idx}", "q", attn)
+                self._attn_meta[f"vlm.layer{layer_idx}"] = (
+                    attn.num_heads, attn.num_key_value_heads, attn.head_dim,
+                )
+                # One hook per layer on the k_proj Linear. The mixture calls
+                # its projection helpers through attn_func, bypassing
+                # self_attn's own forward, so hooks on self_attn never fire.
+                if hasattr(attn, 'q_proj') and hasattr(attn, 'k_proj'):
+                    hook = attn.k_proj.register_forward_hook(
+                        self._create_proj_hook(f"vlm.layer{layer_idx}", attn)
                     )
-                    self.hooks.append(hook_q)
-                if hasattr(attn, 'k_proj'):
-                    hook_k = attn.k_proj.register_forward_hook(
-                        self._create_proj_hook(f"vlm.layer{layer_idx}", "k", attn)
-                    )
-                    self.hooks.append(hook_k)
+                    self.hooks.append(hook)
+
+        print(f"[AttentionCapture] Hooked {len(self.hooks)} attention layers")
+
+    def _create_proj_hook(self, layer_name: str, attn_module):
+        """Create hook on the K projection that scores the last query token.
 
-        print(f"[AttentionCapture] Hooked {len(self.hooks)} projection layers")
+        Q and K project the same hidden states, so the hook re-projects only
+        the last token through q_proj instead of pairing up a separate Q hook.
+        """
+        num_heads, num_kv_heads, head_dim = self._attn_meta[layer_name]
+        scale = 1.0 / math.sqrt(head_dim)
 
-    def _create_proj_hook(self, layer_name: str, proj_type: str, attn_module):
-        """Create hook for Q or K projection layer."""
         def hook(module, inputs, outputs):
-            try:
-                # outputs is the projected tensor [B, S, H*D]
-                if proj_type == "q":
-                    self._q_cache[layer_name] = outputs.detach()
-                elif proj_type == "k":
-                    self._k_cache[layer_name] = outputs.detach()
-
-                # When we have both Q and K for this layer, compute attention
-                if layer_name in self._q_cache and layer_name in self._k_cache:
-                    q = self._q_cache.pop(layer_name)
-                    k = self._k_cache.pop(layer_name)
-
-                    bsz, seq_len, _ = q.shape
-                    num_heads = attn_module.num_heads
-                    num_kv_heads = attn_module.num_key_value_heads
-                    head_dim = attn_module.head_dim
-
-                    q = q.view(bsz, seq_len, num_heads, head_dim).transpose(1, 2)
-                    k = k.view(bsz, seq_len, num_kv_heads, head_dim).transpose(1, 2)
-
-                    # Expand K to match Q heads (GQA)
-                    if num_kv_heads != num_heads:
-                        num_groups = num_heads // num_kv_heads
-                        k = k.unsqueeze(2).expand(bsz, num_kv_heads, num_groups, seq_len, head_dim)
-                        k = k.reshape(bsz, num_heads, seq_len, head_dim)
-
-                    attn = torch.matmul(q, k.transpose(-2, -1)) / math.sqrt(head_dim)
-                    attn = torch.softmax(attn, dim=-1)
-                    self.attention_weights.append({
-                        'layer': layer_name,
-                        'weights': attn.detach().cpu().float(),  # Convert bf16 -> float32
-                    })
-            except Exception as e:
-                print(f"[AttentionCapture] Hook error in {layer_name}.{proj_type}: {e}")
+            if not self.enabled:
+                return
+            # inputs[0] is hidden_states [B, S, hidden]; outputs is K [B, S, Hkv*D]
+            k = outputs.detach()
+            bsz, seq_len, _ = k.shape
+
+            # Only the last query row is ever read (get_attention_map),
+            # so project and score just that row: O(S) instead of O(S^2)
+            q = attn_module.q_proj(inputs[0][:, -1:]).detach()
+            # Fold the softmax scale into the single query row rather than
+            # dividing the [B, H, 1, S] scores afterwards
+            # GQA: group the query heads by their KV head, [B, Hkv, G, 1, D],
+            # and let matmul broadcast K over the group dim instead of
+            # materializing a num_groups-times expanded copy of K
+            q = (q * scale).view(bsz, num_kv_heads, num_heads // num_kv_heads, 1, head_dim)
+            # [B, Hkv, 1, D, S]
+            k = k.view(bsz, seq_len, num_kv_heads, head_dim).permute(0, 2, 3, 1).unsqueeze(2)
+
+            # [B, H, 1, S]: softmax over all keys, as in the full matrix
+            attn = torch.matmul(q, k).view(bsz, num_heads, 1, seq_len)
+            attn = torch.softmax(attn, dim=-1)
+            # Average the image-token columns over heads and fold them
+            # into running aggregates on device: a per-layer .cpu()
+            # would sync mid-forward, and no per-layer stack is kept.
+            # get_attention_map transfers the result once.
+            row = attn[:, :, 0, :self.num_image_tokens].float().mean(dim=1)
+            self._attn_sum = row if self._attn_sum is None else self._attn_sum + row
+            self._attn_last = row
+            self._num_layers_captured += 1
         return hook
 
-    def get_attention_map(self, aggregate: str = 'mean') -> Optional[np.ndarray]:
-        """Get aggregated attention from last token to image tokens."""
-        if not self.attention_weights:
-            return None
+    @contextmanager
+    def capture(self):
+        """Record attention for the forward passes run inside this block.
 
-        all_attn = []
-        for layer_data in self.attention_weights:
-            attn = layer_data['weights']
-            try:
-                # Last query token attending to image tokens
-                action_to_img = attn[:, :, -1, :self.num_image_tokens]
-                all_attn.append(action_to_img)
-            except IndexError:
-                continue
+        Previously captured attention is cleared on entry.
+        """
+        self.clear()
+        self.enabled = True
+        try:
+            yield self
+        finally:
+            self.enabled = False
+
+    def get_attention_map(self, aggregate: str = 'mean') -> Optional[np.ndarray]:
+        """Get aggregated attention from last token to image tokens.
 
-        if not all_attn:
+        Aggregates are accumulated on the model's device during capture;
+        only the final map is copied to the host here.
+        """
+        if self._num_layers_captured == 0:
             return None
 
-        stacked = torch.stack(all_attn, dim=0)
-        if aggregate == 'mean':
-            agg = stacked.mean(dim=(0, 2))
-        elif aggregate == 'last':
-            agg = stacked[-1].mean(dim=1)
+        if aggregate == 'last':
+            # Last layer, averaged over heads
+            agg = self._attn_last
         else:
-            agg = stacked.mean(dim=(0, 2))
+            # 'mean': average over layers and heads
+            agg = self._attn_sum / self._num_layers_captured
 
-        return agg[0].float().numpy()
+        # Single device -> host transfer of the reduced [num_image_tokens] map
+        return agg[0].cpu().numpy()
 
     def save_attention_map(self, image: np.ndarray, save_path: str, aggregate: str = 'mean'):
-        """Save attention heatmap overlay."""
-        import matplotlib
-        matplotlib.use('Agg')  # Non-interactive backend
-        import matplotlib.pyplot as plt
+        """Save attention heatmap overlay.
+
+        Writes Input | Attention (grid) with a 0-1 colorbar | Overlay side by
+        side under a title row, drawn directly with cv2 (no matplotlib
+        figure per call).
+        """
+        import cv2
         from PIL import Image as PILImage
 
         attn = self.get_attention_map(aggregate)
@@ -141,39 +192,51 @@ class AttentionCapture:
         # Prepare image
         if image.dtype != np.uint8:
             image = (image * 255).astype(np.uint8) if image.max() <= 1.0 else image.astype(np.uint8)
-        pil_image = PILImage.fromarray(image)
-
-        # Resize attention
-        attn_pil = PILImage.fromarray((attn_map * 255).astype(np.uint8))
-        attn_resized = np.array(attn_pil.resize(pil_image.size, PILImage.BILINEAR)).astype(np.float32) / 255.0
-
-        # Create figure
-        fig, axes = plt.subplots(1, 3, figsize=(12, 4))
-
-        axes[0].imshow(pil_image)
-        axes[0].set_title('Input')
-        axes[0].axis('off')
-
-        im = axes[1].imshow(attn_map, cmap='jet')
-        axes[1].set_title(f'Attention ({grid_size}x{grid_size})')
-        axes[1].axis('off')
-        plt.colorbar(im, ax=axes[1], fraction=0.046)
-
-        axes[2].imshow(pil_image)
-        axes[2].imshow(attn_resized, alpha=0.5, cmap='jet')
-        axes[2].set_title('Overlay')
-        axes[2].axis('off')
-
-        plt.tight_layout()
-        plt.savefig(save_path, dpi=100, bbox_inches='tight')
-        plt.close(fig)
+        rgb = np.asarray(PILImage.fromarray(image).convert('RGB'))
+        height, width = rgb.shape[:2]
+
+        attn_u8 = (attn_map * 255).astype(np.uint8)
+
+        # Attention grid: blocky upscale of the token grid, jet-colored
+        grid_panel = _JET_LUT[cv2.resize(attn_u8, (width, height), interpolation=cv2.INTER_NEAREST)]
+
+        # Overlay: bilinear-upsampled attention blended 50/50 over the input
+        attn_resized = cv2.resize(attn_u8, (width, height), interpolation=cv2.INTER_LINEAR)
+        overlay = cv2.addWeighted(rgb, 0.5, _JET_LUT[attn_resized], 0.5, 0)
+
+        # Layout: title row on top; colorbar (strip + tick labels) after the grid
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        title_h, bar_pad, bar_w, label_w = 24, 4, 12, 30
+        bar_x = 2 * width + bar_pad
+        overlay_x = bar_x + bar_w + label_w
+        canvas = np.full((title_h + height, overlay_x + width, 3), 255, dtype=np.uint8)
+        canvas[title_h:, :width] = rgb
+        canvas[title_h:, width:2 * width] = grid_panel
+        canvas[title_h:, overlay_x:] = overlay
+
+        # Colorbar: 1.0 at the top down to 0.0 at the bottom
+        bar_values = np.linspace(255, 0, height).astype(np.uint8)
+        canvas[title_h:, bar_x:bar_x + bar_w] = _JET_LUT[bar_values][:, None]
+        for value in (1.0, 0.5, 0.0):
+            y = title_h + int(round((1.0 - value) * (height - 1)))
+            y = min(max(y + 4, title_h + 9), title_h + height - 2)
+            cv2.putText(canvas, f"{value:.1f}", (bar_x + bar_w + 3, y), font, 0.35,
+                        (0, 0, 0), 1, cv2.LINE_AA)
+
+        titles = ('Input', f'Attention ({grid_size}x{grid_size})', 'Overlay')
+        for title, x0 in zip(titles, (0, width, overlay_x)):
+            (text_w, text_h), _ = cv2.getTextSize(title, font, 0.5, 1)
+            org = (x0 + max((width - text_w) // 2, 0), (title_h + text_h) // 2)
+            cv2.putText(canvas, title, org, font, 0.5, (0, 0, 0), 1, cv2.LINE_AA)
+
+        PILImage.fromarray(canvas).save(save_path)
         return True
 
     def clear(self):
         """Clear captured attention."""
-        self.attention_weights = []
-        self._q_cache = {}
-        self._k_cache = {}
+        self._attn_sum = None
+        self._attn_last = None
+        self._num_layers_captured = 0
 
     def remove_hooks(self):
         """Remove all hooks."""
@@ -0,0 +1,91 @@
+"""CPU stand-ins for Sam3Processor / Sam3Model shared by the SAM3 tests."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from transformers import BatchEncoding
+
+
+class FakeSam3Processor:
+    """Stands in for Sam3Processor.
+
+    Text prompts are tokenized to one id per concept, and post-processing
+    returns the canned ``detections`` (concept -> [(mask, score)]) for each
+    concept in the batch.
+    """
+
+    def __init__(self, detections=None):
+        self.detections = detections or {}
+        self.vocab = []
+
+    def __call__(self, images=None, text=None, return_tensors="pt"):
+        if text is not None:
+            ids = []
+            for concept in text:
+                if concept not in self.vocab:
+                    self.vocab.append(concept)
+                ids.append([self.vocab.index(concept)])
+            input_ids = torch.tensor(ids)
+            return BatchEncoding({"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)})
+        image = np.array(images)  # writable copy (PIL images and shm views are not)
+        h, w = image.shape[:2]
+        pixel_values = torch.from_numpy(image).permute(2, 0, 1)
+        return {
+            "pixel_values": pixel_values[None].float(),
+            "original_sizes": torch.tensor([[h, w]]),
+        }
+
+    def post_process_instance_segmentation(self, outputs, threshold, mask_threshold, target_sizes):
+        results = []
+        for concept_id in outputs["concept_ids"].tolist():
+            kept = [
+                (mask, score)
+                for mask, score in self.detections.get(self.vocab[concept_id], [])
+                if score > threshold
+            ]
+            if not kept:
+                results.append({"masks": torch.zeros(0, 1, 1), "scores": torch.zeros(0)})
+                continue
+            results.append({
+                "masks": torch.stack([torch.from_numpy(m).long() for m, _ in kept]),
+                "scores": torch.tensor([score for _, score in kept]),
+            })
+        return results
+
+
+class FakeSam3Model:
+    """Minimal Sam3Model: the decode just echoes each row's concept id.
+
+    Every vision output is written into one reused buffer, mimicking
+    torch.compile(mode="reduce-overhead"), whose outputs live in the CUDA
+    graph memory pool and are overwritten by the next replay.
+    """
+
+    dtype = torch.float32
+
+    def __init__(self):
+        self._vision_out = torch.zeros(1, 4)
+        self.vision_calls = 0
+        self.decode_calls = 0
+
+    def get_vision_features(self, pixel_values):
+        self.vision_calls += 1
+        self._vision_out.fill_(float(pixel_values.mean()))
+        return {"last_hidden_state": self._vision_out}
+
+    def get_text_features(self, input_ids, attention_mask):
+        return SimpleNamespace(pooler_output=input_ids.float()[:, :, None])
+
+    def __call__(self, vision_embeds, attention_mask, text_embeds=None, input_ids=None):
+        self.decode_calls += 1
+        if input_ids is None:
+            input_ids = text_embeds.pooler_output[:, :, 0].long()
+        return {"concept_ids": input_ids[:, 0]}
+
+
+def box(h, w, y0, y1, x0, x1):
+    """(h, w) uint8 mask with ones in [y0:y1, x0:x1]."""
+    mask = np.zeros((h, w), dtype=np.uint8)
+    mask[y0:y1, x0:x1] = 1
+    return mask
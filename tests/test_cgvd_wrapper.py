@@ -0,0 +1,63 @@
+"""Tests for CGVDWrapper compositing."""
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from src.cgvd.cgvd_wrapper import CGVDWrapper, _draw_outline
+
+
+class _DummyEnv(gym.Env):
+    observation_space = gym.spaces.Box(0, 255, (32, 40, 3), np.uint8)
+    action_space = gym.spaces.Box(-1.0, 1.0, (7,), np.float32)
+
+
+@pytest.fixture
+def wrapper():
+    return CGVDWrapper(_DummyEnv(), use_mock_segmenter=True, disable_inpaint=True)
+
+
+@pytest.mark.parametrize("with_distractor", [True, False])
+def test_band_composite_matches_full_frame_blend(wrapper, with_distractor):
+    rng = np.random.default_rng(0)
+    h, w = 32, 40
+    image = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    inpainted = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+
+    # Weights just outside [0, 1], as float rounding in the blur can produce
+    mask = np.full((h, w), -1e-3, dtype=np.float32)
+    mask[2:22, 2:32] = 1.001
+    distractor = None
+    if with_distractor:
+        distractor = np.zeros((h, w), dtype=np.float32)
+        distractor[8:12, 10:14] = 1.0
+    safe = np.zeros((h, w), dtype=np.float32)
+    safe[24:30, 30:38] = 1.0
+    wrapper.cached_distractor_mask = distractor
+    wrapper.cached_safe_mask = safe
+    wrapper.current_safe_mask = None
+
+    composite = wrapper._composite(image, inpainted, mask)
+
+    # _composite leaves its final per-pixel weights in the feather buffer
+    feathered = wrapper._feather_buf
+    assert feathered.min() >= 0.0 and feathered.max() <= 1.0
+    assert ((feathered > 0.0) & (feathered < 1.0)).any()
+    f = feathered[..., None]
+    expected = (f * inpainted.astype(np.float32) +
+                (1.0 - f) * image.astype(np.float32)).astype(np.uint8)
+    np.testing.assert_array_equal(composite, expected)
+
+
+@pytest.mark.parametrize("thickness", [1, 2])
+def test_outline_of_mask_touching_the_border(thickness):
+    mask = np.zeros((10, 12), dtype=np.uint8)
+    mask[:6, :5] = 1  # touches the top and left edges
+    panel = np.zeros((10, 12, 3), dtype=np.uint8)
+
+    _draw_outline(panel, mask, (255, 0, 0), thickness=thickness)
+
+    outline = panel[..., 0] == 255
+    assert outline[0, :5].all() and outline[:6, 0].all()
+    assert outline[5, :5].all() and outline[:6, 4].all()
+    assert not outline[2, 2]
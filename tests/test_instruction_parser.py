@@ -0,0 +1,32 @@
+"""Tests for InstructionParser."""
+
+import pytest
+
+from src.cgvd import instruction_parser
+from src.cgvd.instruction_parser import InstructionParser
+
+
+@pytest.mark.parametrize(
+    "instruction, expected_target",
+    [
+        ("grab the \u201ceggplant\u201d", "eggplant"),
+        ("lift \u2018carrot\u2019 gently", "carrot"),
+        ("grab \u2014 the cup \u2013 now", "cup"),
+        ("grab the red_block!", "red_block"),
+    ],
+)
+def test_target_strips_unicode_punctuation(instruction, expected_target):
+    target, _ = InstructionParser().parse(instruction)
+    assert target == expected_target
+
+
+def test_parse_cache_is_lru_bounded(monkeypatch):
+    monkeypatch.setattr(instruction_parser, "_PARSE_CACHE_SIZE", 2)
+    parser = InstructionParser()
+
+    parser.parse("put the spoon on the towel")
+    parser.parse("grab the cup")
+    parser.parse("Put the spoon on the towel ")  # hit, refreshes the entry
+    parser.parse("lift the block")
+
+    assert list(parser._cache) == ["put the spoon on the towel", "lift the block"]
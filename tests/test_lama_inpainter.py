@@ -0,0 +1,40 @@
+"""Tests for LamaInpainter's reused mask buffers."""
+
+import threading
+import time
+
+import numpy as np
+
+from src.cgvd.lama_inpainter import LamaInpainter
+
+
+class _SlowEchoModel:
+    """Stands in for SimpleLama: returns the mask it was given, after a pause."""
+
+    def __call__(self, image, mask):
+        time.sleep(0.05)  # let a concurrent call reach the shared buffers
+        return mask.copy()
+
+
+def test_concurrent_inpaint_calls_keep_their_own_masks():
+    inpainter = LamaInpainter(device="cpu")
+    inpainter._model = _SlowEchoModel()
+    image = np.zeros((16, 16, 3), dtype=np.uint8)
+    masks = [np.zeros((16, 16), dtype=np.float32) for _ in range(2)]
+    masks[0][:8] = 1
+    masks[1][8:] = 1
+    results = [None, None]
+    start = threading.Barrier(2)
+
+    def run(i):
+        start.wait()
+        results[i] = inpainter.inpaint(image, masks[i], dilate_mask=0)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for mask, result in zip(masks, results):
+        np.testing.assert_array_equal(result, mask.astype(np.uint8) * 255)
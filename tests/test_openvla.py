@@ -0,0 +1,23 @@
+"""Tests for OpenVLAInference argument validation (no model is loaded)."""
+
+import pytest
+
+from src.model.vla.openvla import OpenVLAInference
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"use_bf16": False},
+        {"use_bf16": False, "load_in_4bit": True},  # no torch_dtype, fp32 norms
+        {"load_in_8bit": True},
+    ],
+)
+def test_flash_attention_requires_bf16_weights(kwargs):
+    with pytest.raises(ValueError, match="needs bf16 weights"):
+        OpenVLAInference(attn_implementation="flash_attention_2", **kwargs)
+
+
+def test_unknown_attn_implementation_is_rejected():
+    with pytest.raises(ValueError, match="Unknown attn_implementation"):
+        OpenVLAInference(attn_implementation="flash")
@@ -0,0 +1,308 @@
+"""Tests for SAM3Segmenter internals that run without the SAM3 model."""
+
+import contextlib
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+
+from src.cgvd import sam3_segmenter
+from src.cgvd.sam3_segmenter import MockSAM3Segmenter, SAM3Segmenter
+from tests.sam3_fakes import FakeSam3Model, FakeSam3Processor, box
+
+
+def _make_segmenter(detections=None, **kwargs) -> SAM3Segmenter:
+    segmenter = SAM3Segmenter(device="cpu", dtype=torch.float32, **kwargs)
+    segmenter.processor = FakeSam3Processor(detections)
+    segmenter.model = FakeSam3Model()
+    segmenter._initialized = True
+    return segmenter
+
+
+def test_compiled_vision_cache_entries_survive_later_frames():
+    segmenter = _make_segmenter(compile_model=True)
+    frame_a = np.full((8, 8, 3), 10, dtype=np.uint8)
+    frame_b = np.full((8, 8, 3), 200, dtype=np.uint8)
+
+    embeds_a, _ = segmenter._get_vision_embeds(frame_a)
+    expected_a = embeds_a["last_hidden_state"].clone()
+    segmenter._get_vision_embeds(frame_b)
+
+    cached_a, sizes_a = segmenter._get_vision_embeds(frame_a)
+    assert segmenter.model.vision_calls == 2  # third call was a cache hit
+    assert sizes_a == [[8, 8]]
+    torch.testing.assert_close(cached_a["last_hidden_state"], expected_a)
+
+
+def test_tensorrt_backend_requires_cuda_device():
+    with pytest.raises(ValueError, match="requires a CUDA device"):
+        SAM3Segmenter(device="cpu", dtype=torch.float32, vision_backend="tensorrt")
+
+
+def test_collect_group_stricter_threshold_drops_instances():
+    h, w = 6, 8
+    strong, weak = box(h, w, 0, 3, 0, 3), box(h, w, 3, 6, 4, 8)
+    union = strong | weak
+    per_concept = {
+        "cup": (union, 0.9, [(strong, 0.9), (weak, 0.4)]),
+        "plate": (weak, 0.3, [(weak, 0.3)]),
+    }
+    segmenter = _make_segmenter()
+
+    combined, individual, scores, inst_masks = segmenter._collect_group(
+        ["cup", "plate"], per_concept, 0.5, h, w,
+    )
+
+    np.testing.assert_array_equal(combined, strong)
+    np.testing.assert_array_equal(individual["cup"]["mask"], strong)
+    assert individual["cup"]["score"] == 0.9
+    assert individual["plate"]["score"] == 0.0
+    assert not individual["plate"]["mask"].any()
+    assert scores == {"cup": 0.9, "plate": 0.0}
+    assert set(inst_masks) == {"cup", "plate"}
+    # Rebuilding the union must not write into the shared per-concept masks
+    np.testing.assert_array_equal(per_concept["cup"][0], strong | weak)
+
+    # At the shared (loosest) threshold every instance is kept under indexed names
+    _, _, scores, inst_masks = segmenter._collect_group(["cup"], per_concept, 0.2, h, w)
+    assert scores == {"cup_0": 0.9, "cup_1": 0.4}
+    assert inst_masks["cup_1"] is weak
+
+
+def _scene(h=12, w=16):
+    detections = {
+        "spoon": [(box(h, w, 0, 4, 0, 4), 0.8), (box(h, w, 6, 10, 0, 4), 0.35)],
+        "towel": [(box(h, w, 2, 8, 6, 12), 0.6)],
+        "robot arm": [(box(h, w, 8, 12, 10, 16), 0.25)],
+        "basket": [],
+    }
+    image = np.random.default_rng(0).integers(0, 256, (h, w, 3), dtype=np.uint8)
+    return detections, image
+
+
+def test_segment_many_matches_separate_segment_calls():
+    detections, image = _scene()
+    groups = ["spoon. towel", "spoon. robot arm. basket", "towel"]
+    thresholds = [0.5, 0.2, None]
+
+    segmenter = _make_segmenter(detections, presence_threshold=0.7)
+    results = segmenter.segment_many(image, groups, thresholds)
+    assert segmenter.model.decode_calls == 1  # one batched decode for all groups
+
+    reference = _make_segmenter(detections, presence_threshold=0.7)
+    for (mask, scores, inst_masks), group, threshold in zip(results, groups, thresholds):
+        expected_mask = reference.segment(image, group, presence_threshold=threshold)
+        assert mask.dtype == expected_mask.dtype == np.float32
+        np.testing.assert_array_equal(mask, expected_mask)
+        assert scores == reference.last_scores
+        assert inst_masks.keys() == reference.last_individual_masks.keys()
+        for name, inst_mask in inst_masks.items():
+            np.testing.assert_array_equal(inst_mask, reference.last_individual_masks[name])
+    assert segmenter.last_scores == results[-1][1]
+
+
+def test_segment_masks_are_uint8_and_combined_mask_is_owned():
+    detections, image = _scene()
+    segmenter = _make_segmenter(detections)
+
+    combined, individual = segmenter.segment(
+        image, "spoon. towel", return_individual_masks=True,
+        presence_threshold=0.3, return_dtype=np.uint8,
+    )
+
+    assert combined.dtype == np.uint8
+    for inst_mask in segmenter.last_individual_masks.values():
+        assert inst_mask.dtype == np.uint8
+        assert set(np.unique(inst_mask)) <= {0, 1}
+    for entry in individual.values():
+        assert entry["mask"].dtype == np.uint8
+    # Instance masks are views into one shared host buffer; the combined mask
+    # is not, so callers may accumulate into it in place
+    spoon_0 = segmenter.last_individual_masks["spoon_0"]
+    assert spoon_0.base is not None
+    assert spoon_0.base is segmenter.last_individual_masks["spoon_1"].base
+    assert not any(np.shares_memory(combined, m) for m in segmenter.last_individual_masks.values())
+    before = spoon_0.copy()
+    combined[...] = 1
+    np.testing.assert_array_equal(spoon_0, before)
+
+
+def test_mock_segment_many_matches_segment():
+    segmenter = MockSAM3Segmenter()
+    image = np.zeros((24, 32, 3), dtype=np.uint8)
+
+    results = segmenter.segment_many(image, ["spoon. towel", "basket"], [0.3, None])
+
+    for (mask, scores, _), group in zip(results, ["spoon. towel", "basket"]):
+        np.testing.assert_array_equal(mask, segmenter.segment(image, group))
+        assert scores == segmenter.last_scores
+
+
+class _BoundedBatchModel(FakeSam3Model):
+    """Runs out of memory on decode batches larger than ``max_batch`` rows."""
+
+    def __init__(self, max_batch):
+        super().__init__()
+        self.max_batch = max_batch
+        self.batch_sizes = []
+
+    def __call__(self, vision_embeds, attention_mask, text_embeds=None, input_ids=None):
+        self.batch_sizes.append(len(attention_mask))
+        if len(attention_mask) > self.max_batch:
+            raise torch.cuda.OutOfMemoryError("CUDA out of memory")
+        return super().__call__(vision_embeds, attention_mask, text_embeds, input_ids)
+
+
+def test_segment_concepts_splits_batch_on_oom():
+    detections, image = _scene()
+    h, w = image.shape[:2]
+    thresholds = {"spoon": 0.3, "towel": 0.5, "robot arm": 0.2, "basket": 0.5}
+
+    reference = _make_segmenter(detections)
+    vision_embeds, sizes = reference._get_vision_embeds(image)
+    expected = reference._segment_concepts(thresholds, vision_embeds, sizes, h, w)
+
+    segmenter = _make_segmenter(detections)
+    segmenter.model = _BoundedBatchModel(max_batch=1)
+    vision_embeds, sizes = segmenter._get_vision_embeds(image)
+    per_concept = segmenter._segment_concepts(thresholds, vision_embeds, sizes, h, w)
+
+    assert segmenter.model.batch_sizes == [4, 2, 1, 1, 2, 1, 1]
+    assert list(per_concept) == list(thresholds)
+    for concept, (mask, score, instances) in expected.items():
+        np.testing.assert_array_equal(per_concept[concept][0], mask)
+        assert per_concept[concept][1] == score
+        assert len(per_concept[concept][2]) == len(instances)
+
+
+def test_segment_concepts_reraises_oom_for_a_single_concept():
+    detections, image = _scene()
+    segmenter = _make_segmenter(detections)
+    segmenter.model = _BoundedBatchModel(max_batch=0)
+    vision_embeds, sizes = segmenter._get_vision_embeds(image)
+
+    with pytest.raises(torch.cuda.OutOfMemoryError):
+        segmenter._segment_concepts({"spoon": 0.5, "towel": 0.5}, vision_embeds, sizes, 12, 16)
+    assert segmenter.model.batch_sizes == [2, 1]
+
+
+class _FailingCapture:
+    def __enter__(self):
+        raise RuntimeError("operation not permitted when stream is capturing")
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _patch_cuda_graph_api(monkeypatch, capturing: bool):
+    """Route _capture_graph's torch.cuda calls to CPU stand-ins whose capture fails."""
+    synced = []
+    fake_stream = SimpleNamespace(wait_stream=lambda other: None)
+    monkeypatch.setattr(torch.cuda, "Stream", lambda device=None: fake_stream)
+    monkeypatch.setattr(torch.cuda, "current_stream", lambda device=None: fake_stream)
+    monkeypatch.setattr(torch.cuda, "stream", lambda s: contextlib.nullcontext())
+    monkeypatch.setattr(torch.cuda, "CUDAGraph", lambda: object())
+    monkeypatch.setattr(torch.cuda, "graph", lambda g: _FailingCapture())
+    monkeypatch.setattr(torch.cuda, "is_current_stream_capturing", lambda: capturing)
+    monkeypatch.setattr(torch.cuda, "synchronize", lambda device=None: synced.append(device))
+    return synced
+
+
+def _graphed_segmenter(detections):
+    segmenter = _make_segmenter(detections, cuda_graphs=True)
+    # Exercise the graph path on CPU; torch.cuda is patched by the caller
+    segmenter._use_cuda_graphs = lambda: segmenter.cuda_graphs
+    return segmenter
+
+
+def test_failed_graph_capture_falls_back_to_eager_decode(monkeypatch):
+    h, w = 6, 8
+    detections = {"spoon": [(box(h, w, 0, 3, 0, 4), 0.9)]}
+    image = np.zeros((h, w, 3), dtype=np.uint8)
+    segmenter = _graphed_segmenter(detections)
+    vision_embeds, sizes = segmenter._get_vision_embeds(image)
+    synced = _patch_cuda_graph_api(monkeypatch, capturing=False)
+
+    per_concept = segmenter._segment_concepts({"spoon": 0.5}, vision_embeds, sizes, h, w)
+
+    assert segmenter.cuda_graphs is False
+    assert segmenter._static_vision is None and not segmenter._graphs
+    assert synced  # the stream was checked before falling back
+    mask, score, instances = per_concept["spoon"]
+    np.testing.assert_array_equal(mask, detections["spoon"][0][0])
+    assert score == pytest.approx(0.9)
+    assert len(instances) == 1
+
+
+def test_failed_graph_capture_raises_if_stream_still_capturing(monkeypatch):
+    segmenter = _graphed_segmenter({})
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    vision_embeds, sizes = segmenter._get_vision_embeds(image)
+    _patch_cuda_graph_api(monkeypatch, capturing=True)
+
+    with pytest.raises(RuntimeError, match="left the stream capturing"):
+        segmenter._segment_concepts({"spoon": 0.5}, vision_embeds, sizes, 4, 4)
+
+
+class _RecordingGraph:
+    def __init__(self):
+        self.replays = 0
+        self.released = False
+
+    def replay(self):
+        self.replays += 1
+
+    def reset(self):
+        self.released = True
+
+
+def test_captured_graphs_are_lru_bounded(monkeypatch):
+    monkeypatch.setattr(sam3_segmenter, "_GRAPH_CACHE_SIZE", 2)
+    segmenter = _graphed_segmenter({})
+    vision_embeds, _ = segmenter._get_vision_embeds(np.zeros((4, 4, 3), dtype=np.uint8))
+    captured = {}
+
+    def fake_capture(n, text_inputs):
+        graph = _RecordingGraph()
+        captured[n] = graph
+        return graph, {"n": n}, text_inputs
+
+    monkeypatch.setattr(segmenter, "_capture_graph", fake_capture)
+    sets = {1: ("spoon",), 2: ("spoon", "towel"), 3: ("spoon", "towel", "cup")}
+
+    segmenter._forward_graphed(sets[1], vision_embeds, {})
+    segmenter._forward_graphed(sets[2], vision_embeds, {})
+    assert segmenter._forward_graphed(sets[1], vision_embeds, {}) == {"n": 1}  # hit
+    segmenter._forward_graphed(sets[3], vision_embeds, {})
+
+    assert list(segmenter._graphs) == [sets[1], sets[3]]
+    assert captured[2].released
+    assert not captured[1].released and not captured[3].released
+    assert captured[1].replays == 2
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="requires CUDA")
+def test_failed_graph_capture_falls_back_on_cuda():
+    class _SyncingModel(FakeSam3Model):
+        def __call__(self, vision_embeds, attention_mask, text_embeds=None, input_ids=None):
+            # A host sync is illegal during capture, so capture fails here
+            vision_embeds["last_hidden_state"].sum().item()
+            return super().__call__(vision_embeds, attention_mask, text_embeds, input_ids)
+
+    segmenter = _make_segmenter(cuda_graphs=True)
+    segmenter.device = "cuda"
+    segmenter.model = _SyncingModel()
+    segmenter._get_text_inputs(("spoon",))
+    segmenter._text_inputs_cache[("spoon",)] = {
+        key: value.to("cuda") if isinstance(value, torch.Tensor)
+        else type(value)(pooler_output=value.pooler_output.to("cuda"))
+        for key, value in segmenter._text_inputs_cache[("spoon",)].items()
+    }
+    vision_embeds = {"last_hidden_state": torch.zeros(1, 4, device="cuda")}
+
+    per_concept = segmenter._segment_concepts({"spoon": 0.5}, vision_embeds, [[4, 4]], 4, 4)
+
+    assert segmenter.cuda_graphs is False
+    assert per_concept["spoon"][1] == 0.0
+    torch.cuda.synchronize()
@@ -0,0 +1,144 @@
+"""Round-trip tests for the SAM3 server / client shared-memory protocol."""
+
+import os
+import select
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pytest
+
+import scripts.sam3_server as sam3_server
+from scripts.sam3_server import _attach_shm, _notify_client, _release_stale_shm, serve
+from src.cgvd.sam3_segmenter import SAM3ClientSegmenter
+from tests.sam3_fakes import FakeSam3Model, FakeSam3Processor, box
+
+
+@pytest.fixture(autouse=True)
+def _shared_resource_tracker(monkeypatch):
+    # Client and server share this process's resource tracker, so the
+    # server's unregister on attach would drop the client's own registration
+    monkeypatch.setattr(resource_tracker, "unregister", lambda name, rtype: None)
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Run the server loop in a thread with the fake model; yields (comm_dir, processor)."""
+    processor = FakeSam3Processor()
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=serve,
+        args=(tmp_path, processor, FakeSam3Model(), "cpu"),
+        kwargs={"should_stop": stop.is_set},
+        daemon=True,
+    )
+    thread.start()
+    ready = tmp_path / "ready"
+    for _ in range(500):
+        if ready.exists():
+            break
+        stop.wait(0.01)
+    yield tmp_path, processor
+    stop.set()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert not ready.exists()
+
+
+def test_client_server_round_trip(server):
+    comm_dir, processor = server
+    client = SAM3ClientSegmenter(comm_dir=str(comm_dir), timeout=10.0)
+    try:
+        for h, w in [(12, 16), (24, 32)]:  # second frame outgrows the segments
+            spoon, towel = box(h, w, 0, 4, 0, 4), box(h, w, 5, 9, 6, 12)
+            processor.detections = {
+                "spoon": [(spoon, 0.9)],
+                "towel": [(towel, 0.3)],
+                "cup": [],
+            }
+            image = np.random.default_rng(h).integers(0, 256, (h, w, 3), dtype=np.uint8)
+            # A stale wakeup from an earlier response must not be mistaken for this one
+            os.write(client._fifo_w, b"\x01")
+
+            mask = client.segment(image, "spoon. towel. cup", presence_threshold=0.5)
+
+            np.testing.assert_array_equal(mask, spoon.astype(bool))
+            assert client.last_scores == pytest.approx({"spoon": 0.9, "towel": 0.0, "cup": 0.0})
+            np.testing.assert_array_equal(client.last_individual_masks["spoon"], spoon)
+            assert not client.last_individual_masks["towel"].any()
+            assert client.last_individual_masks["spoon"].dtype == np.uint8
+        # Results are copies, independent of the reused shared memory
+        assert not np.shares_memory(mask, client._shm["mask"].buf)
+    finally:
+        client.close()
+    assert client._shm == {}
+
+
+@pytest.fixture
+def select_spy(monkeypatch):
+    """Record whether each client select() woke on the FIFO or timed out."""
+    woke = []
+    real_select = select.select
+
+    def spy(rlist, wlist, xlist, timeout=None):
+        ready = real_select(rlist, wlist, xlist, timeout)
+        woke.append(bool(ready[0]))
+        return ready
+
+    monkeypatch.setattr(select, "select", spy)
+    return woke
+
+
+def test_client_wakes_on_fifo_notification(server, select_spy):
+    comm_dir, processor = server
+    processor.detections = {"spoon": [(box(8, 8, 0, 4, 0, 4), 0.9)]}
+    client = SAM3ClientSegmenter(comm_dir=str(comm_dir), timeout=10.0)
+    try:
+        for _ in range(3):
+            client.segment(np.zeros((8, 8, 3), dtype=np.uint8), "spoon")
+    finally:
+        client.close()
+    # Every wait ended on the server's byte, never on the select timeout
+    assert all(select_spy)
+
+
+def test_server_error_response_wakes_client(server, select_spy, monkeypatch):
+    comm_dir, _ = server
+
+    def failing_handle_request(*args, **kwargs):
+        raise ValueError("boom")
+
+    monkeypatch.setattr(sam3_server, "handle_request", failing_handle_request)
+    client = SAM3ClientSegmenter(comm_dir=str(comm_dir), timeout=10.0)
+    try:
+        with pytest.raises(RuntimeError, match="boom"):
+            client.segment(np.zeros((8, 8, 3), dtype=np.uint8), "spoon")
+    finally:
+        client.close()
+    assert all(select_spy)
+
+
+def test_notify_client_without_reader_is_a_no_op(tmp_path):
+    fifo_path = tmp_path / "response.fifo"
+    _notify_client(fifo_path)  # no FIFO: older polling client
+    os.mkfifo(fifo_path)
+    _notify_client(fifo_path)  # FIFO but no reader
+
+
+def test_release_stale_shm_keeps_handles_that_are_still_in_use(capsys):
+    block = shared_memory.SharedMemory(create=True, size=16)
+    try:
+        cache = {}
+        # frombuffer holds a buffer export, like any live view of the block
+        view = np.frombuffer(_attach_shm(block.name, cache).buf, dtype=np.uint8)
+
+        _release_stale_shm(cache, keep=())
+        assert block.name in cache
+        assert "still in use" in capsys.readouterr().out
+
+        del view
+        _release_stale_shm(cache, keep=())
+        assert cache == {}
+    finally:
+        block.close()
+        block.unlink()